@@ -1,5 +1,33 @@
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
 
+AUTOMATIC_BOOTSTRAP = "{{ cookiecutter.automatic_bootstrap }}" == "y"
+
+# An optional cache directory shared between bootstraps (eg: on a CI volume)
+# holding poetry's and pip's downloads.
+CACHE_DIR = os.environ.get("COOKIECUTTER_BOOTSTRAP_CACHE")
+
+# Files only needed by an option, removed when it's turned off
+OPTIONAL_FILES = {
+    "compile_with_mypyc": ["build_mypyc.py"],
+}
+
+
+class BootstrapError(Exception):
+    """A bootstrap command failed."""
+
+
+def remove_unused_files(project_dir, options):
+    """Remove the files belonging to options which are turned off."""
+    for option, paths in OPTIONAL_FILES.items():
+        if options[option] != "y":
+            for path in paths:
+                os.remove(os.path.join(project_dir, path))
+
 
 def print_setup_instructions():
     print(
@@ -38,7 +66,147 @@ def print_setup_instructions():
     )
 
 
-print("Template successfully created.\n")
-print_setup_instructions()
-print("Happy Developing!\n")
-exit(0)
+def bootstrap_env():
+    """
+    Get the environment to run the bootstrap commands with.
+
+    Only download caches are kept in CACHE_DIR, as the environment only applies
+    to the bootstrap. Poetry creates virtualenvs in its cache directory by
+    default, so they're pinned to where later poetry commands will look for
+    them. pre-commit's hook environments are left where its git hook will look
+    for them (PRE_COMMIT_HOME, or its default), their builds use pip's cache.
+    """
+    env = dict(os.environ)
+    if CACHE_DIR:
+        env["POETRY_VIRTUALENVS_PATH"] = run(
+            ["poetry", "config", "virtualenvs.path"], env
+        ).strip()
+        env["POETRY_CACHE_DIR"] = os.path.join(CACHE_DIR, "poetry")
+        env["PIP_CACHE_DIR"] = os.path.join(CACHE_DIR, "pip")
+    return env
+
+
+def run(argv, env):
+    """
+    Run a command, returning its output.
+
+    Raises a BootstrapError (including the output) if it fails.
+    """
+    result = subprocess.run(
+        argv,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise BootstrapError("`%s` failed:\n%s" % (" ".join(argv), result.stdout))
+    return result.stdout
+
+
+def timed(timings, phase, func, *args):
+    """Call func, recording how long it took under phase."""
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings[phase] = time.perf_counter() - start
+
+
+def bootstrap(timings):
+    """
+    Set up the project's repository and development environment.
+
+    The dependency install is overlapped with building the pre-commit hook
+    environments, as long as pre-commit is available outside of the project's
+    virtualenv. Otherwise the hooks are installed afterwards, via poetry.
+    """
+    if shutil.which("poetry") is None:
+        raise BootstrapError("poetry not installed")
+    env = bootstrap_env()
+    if CACHE_DIR:
+        for name in ("poetry", "pip"):
+            state = "warm" if os.path.isdir(os.path.join(CACHE_DIR, name)) else "cold"
+            print("Using %s %s cache in %s" % (state, name, CACHE_DIR))
+
+    def init_repo():
+        run(["git", "init"], env)
+        run(["git", "add", "--all"], env)
+        run(["git", "commit", "-m", "initial template render"], env)
+
+    timed(timings, "git init", init_repo)
+
+    pre_commit = shutil.which("pre-commit")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        install = executor.submit(
+            timed,
+            timings,
+            "poetry install",
+            run,
+            ["poetry", "install", "-E", "docs", "-E", "tests"],
+            env,
+        )
+        if pre_commit is not None:
+            hooks = executor.submit(
+                timed,
+                timings,
+                "pre-commit hook environments",
+                run,
+                [pre_commit, "install-hooks"],
+                env,
+            )
+            hooks.result()
+        install.result()
+
+    def finish():
+        hook_argv = ["poetry", "run", "pre-commit", "install"]
+        if pre_commit is None:
+            hook_argv.append("--install-hooks")
+        run(hook_argv, env)
+        run(["git", "add", "poetry.lock"], env)
+        run(["git", "commit", "-m", "Adding initial lock file"], env)
+        run(
+            [
+                "git",
+                "remote",
+                "add",
+                "origin",
+                "git@github.com:{{ cookiecutter.github_username }}/{{ cookiecutter.github_repo_name }}.git",
+            ],
+            env,
+        )
+
+    timed(timings, "pre-commit install + lock file", finish)
+
+
+def print_timings(timings):
+    for phase, seconds in timings.items():
+        print("  %-30s %6.1fs" % (phase, seconds))
+
+
+if __name__ == "__main__":
+    remove_unused_files(
+        os.getcwd(), {"compile_with_mypyc": "{{ cookiecutter.compile_with_mypyc }}"}
+    )
+    print("Template successfully created.\n")
+    if AUTOMATIC_BOOTSTRAP:
+        print("Bootstrapping {{ cookiecutter.project_name }}...")
+        timings = {}
+        try:
+            timed(timings, "total", bootstrap, timings)
+        except BootstrapError as e:
+            # Keep the project, so setup can be completed manually
+            print("Bootstrap failed: %s\n" % e)
+            print_timings(timings)
+            print_setup_instructions()
+        else:
+            print("Bootstrap complete:")
+            print_timings(timings)
+            print(
+                "\nPush the project to GitHub with: "
+                "git push -u origin {{ cookiecutter.github_default_branch_name }}\n"
+            )
+    else:
+        print_setup_instructions()
+    print("Happy Developing!\n")
+    exit(0)
@@ -4,22 +4,34 @@ import sys
 MODULE_REGEX = r"^[_a-zA-Z][_a-zA-Z0-9]+$"
 
 
-project_name = "{{ cookiecutter.project_name }}"
-module_name = "{{ cookiecutter.module_name}}"
+def validate(project_name, module_name):
+    """Check the project and module names, returning a list of error messages."""
+    errors = []
 
+    # Check project name
+    if re.match(r"\s", project_name):
+        errors.append(
+            "The project_name (%s) can not contain whitespace." % project_name
+        )
 
-# Check project name
-if re.match(r"\s", project_name):
-    print("ERROR: The project_name (%s) can not contain whitespace." % project_name)
-    sys.exit(1)
+    # Check module name
+    if not re.match(MODULE_REGEX, module_name):
+        errors.append(
+            "The module_name (%s) is not a valid Python module name. Please do not use a - and use _ instead"
+            % module_name
+        )
 
+    return errors
 
-# Check module name
-if not re.match(MODULE_REGEX, module_name):
-    print(
-        "ERROR: The module_name (%s) is not a valid Python module name. Please do not use a - and use _ instead"
-        % module_name
-    )
 
-    # Exit to cancel project
-    sys.exit(1)
+if __name__ == "__main__":
+    project_name = "{{ cookiecutter.project_name }}"
+    module_name = "{{ cookiecutter.module_name}}"
+
+    errors = validate(project_name, module_name)
+    for error in errors:
+        print("ERROR: %s" % error)
+
+    if errors:
+        # Exit to cancel project
+        sys.exit(1)
@@ -0,0 +1,223 @@
+"""
+Generate several projects from this template at once.
+
+    $ python scripts/batch_generate.py projects.json --output-dir out --jobs 8
+
+The manifest is either a JSON file holding a list of objects, or a CSV file
+with a header row, mapping `cookiecutter.json` keys to the values to use for
+each project. Keys which are left out take their defaults, just like
+`cookiecutter --no-input`.
+
+Every context is validated up front with the checks from
+`hooks/pre_gen_project.py`, so nothing is rendered unless the whole manifest
+is valid. Projects are then rendered in parallel worker processes without
+running the hooks as scripts: only the post-gen hook's removal of unused
+files is applied, its setup instructions and bootstrap are skipped. The
+workers share an on-disk Jinja bytecode cache, so each template file is only
+parsed and compiled once per batch rather than once per project.
+"""
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from cookiecutter.exceptions import CookiecutterException
+from cookiecutter.generate import generate_context, generate_files
+from cookiecutter.prompt import prompt_for_config
+from jinja2 import FileSystemBytecodeCache
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent
+CONTEXT_FILE = TEMPLATE_DIR / "cookiecutter.json"
+HOOKS_DIR = TEMPLATE_DIR / "hooks"
+
+# Set in each worker process by init_worker()
+BYTECODE_CACHE = None
+POST_GEN_HOOK = None
+
+
+def load_hook(name):
+    """Import a hook as a module, to reuse its functions."""
+    spec = importlib.util.spec_from_file_location(name, HOOKS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_manifest(path):
+    """Read the per-project values from a JSON or CSV manifest."""
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="") as fp:
+            return list(csv.DictReader(fp))
+    with path.open() as fp:
+        rows = json.load(fp)
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError(f"{path} must contain a list of objects")
+    return rows
+
+
+def build_context(row, output_dir):
+    """Render the full cookiecutter context for a manifest row."""
+    context = generate_context(context_file=str(CONTEXT_FILE), extra_context=row)
+    context["_cookiecutter"] = {
+        k: v for k, v in context["cookiecutter"].items() if not k.startswith("_")
+    }
+    context["cookiecutter"].update(prompt_for_config(context, no_input=True))
+    context["cookiecutter"]["_template"] = str(TEMPLATE_DIR)
+    context["cookiecutter"]["_output_dir"] = str(output_dir)
+    return context
+
+
+def build_contexts(rows, output_dir):
+    """
+    Build and validate the context for every manifest row.
+
+    Returns a list of contexts and a list of error messages.
+    """
+    validate = load_hook("pre_gen_project").validate
+    known_keys = set(json.loads(CONTEXT_FILE.read_text()))
+    contexts = []
+    errors = []
+    seen = {}
+    for number, row in enumerate(rows, start=1):
+        unknown = sorted(set(row) - known_keys)
+        if unknown:
+            errors.append(f"Row {number}: unknown keys: {', '.join(unknown)}")
+            continue
+        try:
+            context = build_context(row, output_dir)
+        except (CookiecutterException, ValueError) as e:
+            errors.append(f"Row {number}: {e}")
+            continue
+        project_name = context["cookiecutter"]["project_name"]
+        module_name = context["cookiecutter"]["module_name"]
+        for error in validate(project_name, module_name):
+            errors.append(f"Row {number} ({project_name}): {error}")
+        if project_name in seen:
+            errors.append(
+                f"Row {number} ({project_name}): duplicates row {seen[project_name]}"
+            )
+        seen[project_name] = number
+        contexts.append(context)
+    return contexts, errors
+
+
+def init_worker(bytecode_cache_dir):
+    """Set up the Jinja bytecode cache shared by all the worker processes."""
+    global BYTECODE_CACHE, POST_GEN_HOOK  # pylint:disable=W0603
+    BYTECODE_CACHE = FileSystemBytecodeCache(bytecode_cache_dir)
+    POST_GEN_HOOK = load_hook("post_gen_project")
+
+
+def render_project(context, output_dir, overwrite):
+    """
+    Render a single project in a worker process.
+
+    Returns the project name, the number of files rendered, the time taken
+    and an error message (None on success).
+    """
+    project_name = context["cookiecutter"]["project_name"]
+    context["cookiecutter"]["_jinja2_env_vars"] = {"bytecode_cache": BYTECODE_CACHE}
+    start = time.perf_counter()
+    try:
+        project_dir = generate_files(
+            repo_dir=str(TEMPLATE_DIR),
+            context=context,
+            output_dir=str(output_dir),
+            overwrite_if_exists=overwrite,
+            accept_hooks=False,
+        )
+        POST_GEN_HOOK.remove_unused_files(project_dir, context["cookiecutter"])
+    except (CookiecutterException, OSError) as e:
+        return project_name, 0, time.perf_counter() - start, str(e)
+    elapsed = time.perf_counter() - start
+    files = sum(len(names) for _, _, names in os.walk(project_dir))
+    return project_name, files, elapsed, None
+
+
+def render_projects(contexts, output_dir, jobs, overwrite):
+    """
+    Render the projects, `jobs` at a time.
+
+    Returns a mapping of project names to their files, seconds and error.
+    """
+    results = {}
+    with TemporaryDirectory() as bytecode_cache_dir, ProcessPoolExecutor(
+        max_workers=jobs, initializer=init_worker, initargs=(bytecode_cache_dir,)
+    ) as executor:
+        futures = [
+            executor.submit(render_project, context, output_dir, overwrite)
+            for context in contexts
+        ]
+        for future in as_completed(futures):
+            name, files, seconds, error = future.result()
+            results[name] = (files, seconds, error)
+    return results
+
+
+def print_report(results, elapsed):
+    """Print the per-project timings and a summary."""
+    width = max(len("Project"), *(len(name) for name in results))
+    print(f"{'Project':<{width}}  {'Files':>5}  {'Seconds':>7}  Status")
+    for name, (files, seconds, error) in sorted(results.items()):
+        status = "ok" if error is None else f"FAILED: {error}"
+        print(f"{name:<{width}}  {files:>5}  {seconds:>7.2f}  {status}")
+    failed = sum(1 for _, _, error in results.values() if error is not None)
+    rendered = sum(seconds for _, seconds, _ in results.values())
+    print(
+        f"Rendered {len(results) - failed}/{len(results)} project(s) in"
+        f" {elapsed:.2f}s ({rendered:.2f}s of rendering time)"
+    )
+
+
+def parse_args(argv=None):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(
+        description="Generate several projects from a JSON or CSV manifest."
+    )
+    parser.add_argument("manifest", type=Path)
+    parser.add_argument("-o", "--output-dir", type=Path, default=Path("."))
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes (default: the number of CPUs).",
+    )
+    parser.add_argument(
+        "-f",
+        "--overwrite-if-exists",
+        action="store_true",
+        help="Render into project directories which already exist.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Generate the projects, returning the process exit code."""
+    args = parse_args(argv)
+    output_dir = args.output_dir.resolve()
+    try:
+        rows = read_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Couldn't read {args.manifest}: {e}")
+        return 1
+    contexts, errors = build_contexts(rows, output_dir)
+    for error in errors:
+        print(f"ERROR: {error}")
+    if errors:
+        return 1
+
+    start = time.perf_counter()
+    results = render_projects(contexts, output_dir, args.jobs, args.overwrite_if_exists)
+    print_report(results, time.perf_counter() - start)
+    return 0 if all(error is None for _, _, error in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
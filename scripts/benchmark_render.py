@@ -0,0 +1,211 @@
+"""
+Benchmark how long it takes to generate a project from this template.
+
+    $ python scripts/benchmark_render.py --save-baseline  # Record a baseline
+    $ python scripts/benchmark_render.py --threshold 0.2  # Compare against it
+
+A project is rendered for every combination of the `license` and
+`enforce_strong_typing` choices. For each combination the rendering itself
+and each hook are timed separately over several repeats, and the number of
+files and bytes generated are recorded. Results are written to JSON and
+compared against the saved baseline, failing if any median got slower than
+the threshold allows.
+
+Timings are only comparable on the same machine, so the baseline is kept out
+of git (in .benchmarks/), CI benchmarks the base commit as its baseline.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from batch_generate import CONTEXT_FILE, TEMPLATE_DIR, build_context
+from cookiecutter.environment import StrictEnvironment
+from cookiecutter.generate import generate_files
+
+HOOKS_DIR = TEMPLATE_DIR / "hooks"
+HOOKS = ("pre_gen_project", "post_gen_project")
+DEFAULT_OUTPUT = TEMPLATE_DIR / ".benchmarks" / "render.json"
+DEFAULT_BASELINE = TEMPLATE_DIR / ".benchmarks" / "render_baseline.json"
+
+
+def cases():
+    """Yield a name and the cookiecutter.json overrides for each combination."""
+    choices = json.loads(CONTEXT_FILE.read_text())
+    for license_, typing in itertools.product(choices["license"], ("y", "n")):
+        name = f"{license_} (enforce_strong_typing={typing})"
+        yield name, {"license": license_, "enforce_strong_typing": typing}
+
+
+def summarize(timings):
+    """Summarize a list of timings, in seconds."""
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def tree_size(path):
+    """Count the files and bytes under path."""
+    files = 0
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, filename))
+    return files, size
+
+
+def time_hook(hook, context, cwd):
+    """Time rendering and running a hook script the way cookiecutter does."""
+    start = time.perf_counter()
+    env = StrictEnvironment(context=context, keep_trailing_newline=True)
+    template = env.from_string((HOOKS_DIR / f"{hook}.py").read_text())
+    with TemporaryDirectory() as tmp_dir:
+        script = Path(tmp_dir) / f"{hook}.py"
+        script.write_text(template.render(**context))
+        subprocess.run(  # nosec
+            [sys.executable, str(script)],
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+    return time.perf_counter() - start
+
+
+def time_case(overrides, repeat):
+    """Render a project `repeat` times, timing rendering and each hook."""
+    timings = {"render": [], **{hook: [] for hook in HOOKS}}
+    files = size = 0
+    for _ in range(repeat):
+        with TemporaryDirectory() as output_dir:
+            context = build_context(overrides, output_dir)
+            timings["pre_gen_project"].append(
+                time_hook("pre_gen_project", context, TEMPLATE_DIR)
+            )
+            start = time.perf_counter()
+            project_dir = generate_files(
+                repo_dir=str(TEMPLATE_DIR),
+                context=context,
+                output_dir=output_dir,
+                accept_hooks=False,
+            )
+            timings["render"].append(time.perf_counter() - start)
+            timings["post_gen_project"].append(
+                time_hook("post_gen_project", context, project_dir)
+            )
+            files, size = tree_size(project_dir)
+    return {
+        **{phase: summarize(values) for phase, values in timings.items()},
+        "files": files,
+        "bytes": size,
+    }
+
+
+def run(repeat, keyword=None):
+    """Benchmark all (matching) cases."""
+    results = {}
+    for name, overrides in cases():
+        if keyword and keyword not in name:
+            continue
+        results[name] = time_case(overrides, repeat)
+        print(
+            f"{name}: render {results[name]['render']['median'] * 1000:.1f}ms,"
+            f" {results[name]['files']} files, {results[name]['bytes']} bytes"
+        )
+    return {
+        "created": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "cases": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline, printing the changes.
+
+    Returns a description of every phase whose median got slower than
+    `1 + threshold` times its baseline median.
+    """
+    regressions = []
+    for name, case in results["cases"].items():
+        base_case = baseline.get("cases", {}).get(name)
+        if base_case is None:
+            print(f"{name}: no baseline, skipping comparison")
+            continue
+        print(
+            f"{name}: {case['files'] - base_case['files']:+d} files,"
+            f" {case['bytes'] - base_case['bytes']:+d} bytes"
+        )
+        for phase in ("render", *HOOKS):
+            ratio = case[phase]["median"] / base_case[phase]["median"]
+            print(f"  {phase}: {ratio:.2f}x baseline")
+            if ratio > 1 + threshold:
+                regressions.append(f"{name} {phase}: {ratio:.2f}x baseline")
+    return regressions
+
+
+def write_json(data, path):
+    """Write data to a JSON file, creating parent directories as required."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def parse_args(argv=None):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark generating projects from this template."
+    )
+    parser.add_argument("-k", "--keyword", help="Only run cases containing this.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown relative to the baseline (0.2 == 20%%).",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save these results as the new baseline instead of comparing.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the benchmarks, returning the process exit code."""
+    args = parse_args(argv)
+    results = run(args.repeat, args.keyword)
+    write_json(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        write_json(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline found at {args.baseline}, skipping comparison")
+        return 0
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.threshold
+    )
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Benchmark suite for {{ cookiecutter.project_name }}."""
@@ -0,0 +1,62 @@
+"""Run the benchmark suite: ``python -m benchmarks --help``."""
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .harness import compare, dump_json, load_json, report_regressions, run
+
+DEFAULT_OUTPUT = Path(".benchmarks") / "results.json"
+DEFAULT_BASELINE = Path("benchmarks") / "baseline.json"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("-k", "--keyword", help="Only run cases containing this.")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats.")
+    parser.add_argument(
+        "--number", type=int, default=0, help="Loops per repeat (0: calibrate)."
+    )
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed slowdown relative to the baseline (0.1 == 10%%).",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save these results as the new baseline instead of comparing.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks, returning the process exit code."""
+    args = parse_args(argv)
+    results = run(args.warmup, args.repeat, args.number, args.keyword)
+    dump_json(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        dump_json(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print(f"No baseline found at {args.baseline}, skipping comparison")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        report_regressions(regressions, args.threshold)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Benchmarks for the overhead of the {{ cookiecutter.module_name }}._perf instrumentation."""
+from {{ cookiecutter.module_name }} import _perf
+
+from .harness import benchmark
+
+# Instrumentation is toggled outside a loop, so that toggling isn't measured
+LOOPS = 1000
+
+
+@benchmark
+def bench_loop_baseline() -> None:
+    """Benchmark the loop alone, to compare the other cases against."""
+    for _ in range(LOOPS):
+        pass
+
+
+@benchmark
+def bench_timer_disabled() -> None:
+    """Benchmark a with block timer while instrumentation is disabled."""
+    _perf.disable()
+    for _ in range(LOOPS):
+        with _perf.timer("bench"):
+            pass
+
+
+@benchmark
+def bench_timer_enabled() -> None:
+    """Benchmark a with block timer while instrumentation is enabled."""
+    _perf.enable()
+    try:
+        for _ in range(LOOPS):
+            with _perf.timer("bench"):
+                pass
+    finally:
+        _perf.disable()
+
+
+@benchmark
+def bench_increment_disabled() -> None:
+    """Benchmark incrementing a counter while instrumentation is disabled."""
+    _perf.disable()
+    for _ in range(LOOPS):
+        _perf.increment("bench")
+
+
+@benchmark
+def bench_increment_enabled() -> None:
+    """Benchmark incrementing a counter while instrumentation is enabled."""
+    _perf.enable()
+    try:
+        for _ in range(LOOPS):
+            _perf.increment("bench")
+    finally:
+        _perf.disable()
@@ -0,0 +1,10 @@
+"""Benchmarks for {{ cookiecutter.project_name }}."""
+import {{ cookiecutter.module_name }}
+
+from .harness import benchmark
+
+
+@benchmark
+def bench_version_lookup() -> None:
+    """Benchmark accessing the version dunder."""
+    getattr({{ cookiecutter.module_name }}, "__version__")
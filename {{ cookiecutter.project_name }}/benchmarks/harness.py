@@ -0,0 +1,159 @@
+"""
+A minimal benchmark harness.
+
+Benchmark cases are plain zero-argument callables registered with the
+:func:`benchmark` decorator in ``benchmarks/bench_*.py`` modules. Each case is
+warmed up, then timed over several repeats with :mod:`timeit`. Results are
+written as JSON and may be compared against a previously saved baseline.
+"""
+import importlib
+import json
+import pkgutil
+import platform
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCHMARKS_DIR = Path(__file__).parent
+
+# Registered benchmark cases, keyed by name.
+CASES: Dict[str, Callable[[], Any]] = {}
+
+
+def benchmark(
+    func: Optional[Callable[[], Any]] = None, *, name: Optional[str] = None
+) -> Any:
+    """
+    Register a zero-argument callable as a benchmark case.
+
+    Usable both bare (``@benchmark``) and with a name (``@benchmark(name=...)``).
+    """
+
+    def register(case: Callable[[], Any]) -> Callable[[], Any]:
+        case_name = name or f"{case.__module__.rpartition('.')[2]}.{case.__name__}"
+        if case_name in CASES:
+            raise ValueError(f"Duplicate benchmark name: {case_name}")
+        CASES[case_name] = case
+        return case
+
+    if func is not None:
+        return register(func)
+    return register
+
+
+def discover() -> None:
+    """Import every ``bench_*`` module so that its cases register themselves."""
+    for module_info in pkgutil.iter_modules([str(BENCHMARKS_DIR)]):
+        if module_info.name.startswith("bench_"):
+            importlib.import_module(f"{__package__}.{module_info.name}")
+
+
+def time_case(
+    case: Callable[[], Any], warmup: int, repeat: int, number: int = 0
+) -> Dict[str, Any]:
+    """
+    Time a single case.
+
+    If ``number`` is 0 the number of loops per repeat is calibrated via
+    :meth:`timeit.Timer.autorange`. All reported timings are seconds per loop.
+    """
+    for _ in range(warmup):
+        case()
+    timer = timeit.Timer(case)
+    if number <= 0:
+        number, _ = timer.autorange()
+    timings = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.mean(timings),
+        "median": statistics.median(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+
+def run(
+    warmup: int, repeat: int, number: int = 0, keyword: Optional[str] = None
+) -> Dict[str, Any]:
+    """Discover and run all (matching) benchmark cases."""
+    discover()
+    results: Dict[str, Any] = {}
+    for name in sorted(CASES):
+        if keyword and keyword not in name:
+            continue
+        results[name] = time_case(CASES[name], warmup, repeat, number)
+        print(f"{name}: {format_seconds(results[name]['median'])} (median)")
+    return {
+        "created": time.time(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[Tuple[str, float, float, float]]:
+    """
+    Compare results against a baseline.
+
+    Returns ``(name, baseline_median, median, ratio)`` for every case that got
+    slower than ``1 + threshold`` times its baseline median.
+    """
+    regressions = []
+    for name, stats in results["benchmarks"].items():
+        base_stats = baseline.get("benchmarks", {}).get(name)
+        if base_stats is None:
+            print(f"{name}: no baseline, skipping comparison")
+            continue
+        ratio = stats["median"] / base_stats["median"]
+        print(f"{name}: {ratio:.2f}x baseline")
+        if ratio > 1 + threshold:
+            regressions.append((name, base_stats["median"], stats["median"], ratio))
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    """Render a duration with a human friendly unit."""
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f}{unit}"
+    return f"{seconds / 1e-9:.1f}ns"
+
+
+def load_json(path: Path) -> Optional[Dict[str, Any]]:
+    """Load a JSON file, returning None if it doesn't exist."""
+    if not path.exists():
+        return None
+    with path.open() as fp:
+        return json.load(fp)  # type: ignore[no-any-return]
+
+
+def dump_json(data: Dict[str, Any], path: Path) -> None:
+    """Write data to a JSON file, creating parent directories as required."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as fp:
+        json.dump(data, fp, indent=2, sort_keys=True)
+        fp.write("\n")
+
+
+def report_regressions(
+    regressions: List[Tuple[str, float, float, float]], threshold: float
+) -> None:
+    """Print regressions to stderr."""
+    print(
+        f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}:",
+        file=sys.stderr,
+    )
+    for name, base, current, ratio in regressions:
+        print(
+            f"  {name}: {format_seconds(base)} -> {format_seconds(current)}"
+            f" ({ratio:.2f}x)",
+            file=sys.stderr,
+        )
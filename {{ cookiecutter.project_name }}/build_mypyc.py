@@ -0,0 +1,65 @@
+"""
+Compile {{ cookiecutter.module_name }} with mypyc when building a wheel.
+
+This is poetry's build script (see `[tool.poetry.build]` in pyproject.toml).
+The wheel falls back to pure Python if the package can't be compiled, eg:
+when no C compiler is available, or when the NO_MYPYC env var is set.
+"""
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+from setuptools.command.build_ext import build_ext
+
+PACKAGE_DIR = Path("src") / "{{ cookiecutter.module_name }}"
+
+# Modules to leave as pure Python, relative to the package directory.
+# __init__.py's module level __getattr__ (PEP 562) isn't supported by mypyc.
+PURE_PYTHON_MODULES = ["__init__.py", "__main__.py"]
+
+
+class OptionalBuildExt(build_ext):  # type: ignore[misc]
+    """Build the extensions, falling back to pure Python if that fails."""
+
+    def run(self) -> None:
+        """Build the extensions, removing any partial results on failure."""
+        try:
+            super().run()
+        except Exception as e:  # pylint:disable=W0703
+            print(f"mypyc compilation failed, falling back to pure Python: {e}")
+            for ext in self.extensions:
+                ext_path = Path(self.get_ext_fullpath(ext.name))
+                if ext_path.exists():
+                    ext_path.unlink()
+
+
+def compiled_modules() -> List[str]:
+    """List the source files to compile."""
+    return sorted(
+        str(path)
+        for path in PACKAGE_DIR.rglob("*.py")
+        if str(path.relative_to(PACKAGE_DIR)) not in PURE_PYTHON_MODULES
+    )
+
+
+def build(setup_kwargs: Dict[str, Any]) -> None:
+    """Add the mypyc compiled extensions to the setup() arguments."""
+    if os.environ.get("NO_MYPYC"):
+        print("NO_MYPYC is set, building pure Python")
+        return
+    try:
+        from mypyc.build import mypycify  # pylint:disable=C0415
+    except ImportError:
+        print("mypyc isn't installed, building pure Python")
+        return
+    modules = compiled_modules()
+    if not modules:
+        print("No modules to compile, building pure Python")
+        return
+    setup_kwargs.update(
+        {
+            "ext_modules": mypycify(modules, opt_level="3"),
+            "cmdclass": {"build_ext": OptionalBuildExt},
+            "zip_safe": False,
+        }
+    )
@@ -1,6 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import json
 import os
+import re
+import time
+import urllib.request
+from pathlib import Path
+
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
 on_rtd = os.environ.get('READTHEDOCS') == 'True'
 #
 # {{cookiecutter.project_name}} documentation build configuration file, created by
@@ -180,9 +189,116 @@ texinfo_documents = [
 ]
 
 
+# -- Cached, offline-capable intersphinx and linkcheck --------------------
+
+# Intersphinx inventories and linkcheck results are cached in .docs_cache/
+# in the project root, and refreshed once they are older than the TTLs below.
+# Set SPHINX_OFFLINE to build using only the cache (eg: on air-gapped build
+# agents), or SPHINX_REFRESH_CACHE to ignore the TTLs (see `inv build.docs-cache`)
+docs_cache_dir = Path(__file__).resolve().parent.parent / '.docs_cache'
+docs_offline = bool(os.environ.get('SPHINX_OFFLINE'))
+docs_refresh_cache = bool(os.environ.get('SPHINX_REFRESH_CACHE'))
+intersphinx_cache_ttl = 7 * 24 * 60 * 60  # seconds
+linkcheck_cache_ttl = 24 * 60 * 60  # seconds
+linkcheck_cache_file = docs_cache_dir / 'linkcheck.json'
+
+
+def cache_is_fresh(path, ttl):
+    """Check if a cache file exists and is younger than ttl seconds."""
+    if docs_refresh_cache or not path.exists():
+        return False
+    return time.time() - path.stat().st_mtime < ttl
+
+
+def intersphinx_cache_file(name):
+    """Get the path an intersphinx inventory is cached at."""
+    return docs_cache_dir / 'intersphinx' / f'{name}.inv'
+
+
+def load_linkcheck_cache():
+    """Load the cached linkcheck results, keyed by URI."""
+    try:
+        return json.loads(linkcheck_cache_file.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
 # Example configuration for intersphinx inventory files
+intersphinx_urls = {
+    'python': 'https://docs.python.org/3',
+#    'twisted': 'https://twistedmatrix.com/documents/current/api/',
+#    'environ': 'https://environ-config.readthedocs.io/en/stable/',
+}
+# Inventories are always read from the cache, see refresh_intersphinx_cache()
 intersphinx_mapping = {
-    'python': ('https://docs.python.org/3', None),
-#    'twisted': ('https://twistedmatrix.com/documents/current/api/', None),
-#    'environ': ('https://environ-config.readthedocs.io/en/stable/', None),
+    name: (url, str(intersphinx_cache_file(name)))
+    for name, url in intersphinx_urls.items()
 }
+
+if docs_offline:
+    # Don't check anything, report_linkcheck_results() reports from the cache
+    linkcheck_ignore = [r'.*']
+else:
+    # Don't recheck links found to be working within the TTL
+    linkcheck_ignore = [
+        re.escape(uri) + '$'
+        for uri, result in load_linkcheck_cache().items()
+        if result['status'] in ('working', 'redirected')
+        and not docs_refresh_cache
+        and time.time() - result['checked'] < linkcheck_cache_ttl
+    ]
+
+
+def refresh_intersphinx_cache(app):
+    """Download intersphinx inventories which aren't cached or are stale."""
+    for name, url in intersphinx_urls.items():
+        cache_file = intersphinx_cache_file(name)
+        if docs_offline or cache_is_fresh(cache_file, intersphinx_cache_ttl):
+            continue
+        inventory_url = url.rstrip('/') + '/objects.inv'
+        try:
+            with urllib.request.urlopen(inventory_url, timeout=30) as response:  # nosec
+                inventory = response.read()
+        except OSError as e:
+            # Fall back to a stale copy, if there is one
+            logger.info(f'Failed to refresh {inventory_url}: {e}')
+            continue
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(inventory)
+
+
+def report_linkcheck_results(app, exception):
+    """
+    Cache the results of a linkcheck build.
+
+    When offline, instead warn about links which are cached as broken or
+    aren't cached at all.
+    """
+    if exception is not None or app.builder.name != 'linkcheck':
+        return
+    cache = load_linkcheck_cache()
+    output = Path(app.outdir) / 'output.json'
+    for line in output.read_text().splitlines():
+        result = json.loads(line)
+        uri, status = result['uri'], result['status']
+        if status in ('local', 'unchecked'):
+            continue
+        if status != 'ignored':
+            cache[uri] = {
+                'status': status,
+                'info': result['info'],
+                'checked': time.time(),
+            }
+        elif docs_offline and uri not in cache:
+            logger.warning(f'{uri} has never been checked (offline)')
+        elif docs_offline and cache[uri]['status'] == 'broken':
+            logger.warning(f'{uri} is broken (cached): {cache[uri]["info"]}')
+    linkcheck_cache_file.parent.mkdir(parents=True, exist_ok=True)
+    linkcheck_cache_file.write_text(json.dumps(cache, indent=2, sort_keys=True))
+
+
+def setup(app):
+    """Hook up the intersphinx and linkcheck caches."""
+    # Run before sphinx.ext.intersphinx loads the inventories
+    app.connect('builder-inited', refresh_intersphinx_cache, priority=400)
+    app.connect('build-finished', report_linkcheck_results)
@@ -1,8 +1,21 @@
 """Noxfile."""
+import hashlib
+import heapq
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
 import tempfile
+import time
+{%- if cookiecutter.compile_with_mypyc == "y" %}
+import zipfile
+{%- endif %}
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import List
+from typing import Dict, List
 
 import nox
 import nox_poetry
@@ -20,10 +33,17 @@ nox.options.sessions = [
 ]
 nox.options.error_on_missing_interpreters = False
 nox.options.error_on_external_run = True
+# Virtualenvs are reused, installs are skipped when they are up to date.
+# See _install()
+nox.options.reuse_existing_virtualenvs = True
 
 
 # Python versions the package supports
 SUPPORTED_PYTHONS: List[str] = [
+    "3.14",
+    "3.13",
+    "3.12",
+    "3.11",
     "3.10",
     "3.9",
     "3.8",
@@ -31,41 +51,405 @@ SUPPORTED_PYTHONS: List[str] = [
 ]
 
 
-# Dependencies imported in either noxfile.py or tasks.py
+# Dependencies imported in either noxfile.py or tasks/
 # (required so mypy and pylint can accurately parse these files)
 IMPORTED_DEV_REQUIREMENTS = [
     "invoke",
     "nox",
     "packaging",
     "nox-poetry",
+    "toml",
 ]
 
 
+# Records what has been installed into a reused virtualenv, see _install()
+# (`inv clean --stale-nox` reads this too)
+INSTALL_CACHE_FILE = ".install-cache.json"
+
+
+def _lock_digest() -> str:
+    """Hash poetry.lock."""
+    return hashlib.sha256(Path("poetry.lock").read_bytes()).hexdigest()
+
+
+def _install(session: Session, *args: str) -> None:
+    """
+    Install packages into the session's virtualenv, unless they already are.
+
+    Installs are keyed on the hash of poetry.lock, the python version and the
+    install arguments (including extras), and recorded in the virtualenv. A
+    reused virtualenv skips the installs it has already done with the current
+    lock file. The project itself is always reinstalled (without dependencies)
+    so that it reflects the current source.
+    """
+    location = getattr(session.virtualenv, "location", None)
+    if location is None:  # eg: --no-venv
+        session.install(*args)
+        return
+
+    cache_file = Path(location) / INSTALL_CACHE_FILE
+    lock = _lock_digest()
+    try:
+        cache = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    if cache.get("lock") != lock:
+        cache = {"lock": lock, "installs": []}
+
+    python = session.python or platform.python_version()
+    key = hashlib.sha256(json.dumps([str(python), args]).encode()).hexdigest()
+    if key not in cache["installs"]:
+        session.install(*args)
+        cache["installs"].append(key)
+        cache_file.write_text(json.dumps(cache))
+    elif any(arg == "." or arg.startswith(".[") for arg in args):
+        session.log("Dependencies are up to date, reinstalling the project only")
+        session.install("--no-deps", ".")
+    else:
+        session.log(f"Skipping up to date install: {' '.join(args)}")
+
+
+# Per-test durations from previous runs, used to balance parallel test workers
+TEST_DURATIONS_FILE = Path(".pytest_cache") / "durations.json"
+# Every test's duration in every run, read by `inv report.slow-tests`
+TEST_HISTORY_FILE = Path(".test-history.sqlite")
+# Values of $TEST_COVERAGE, see _test_argv()
+COVERAGE_MODES = ("branch", "sysmon", "off")
+# Where test sessions write memory reports when $TEST_MEMORY is set
+MEMORY_REPORT_DIR = Path(".pytest_cache") / "memory"
+
+
+def _load_test_durations() -> Dict[str, float]:
+    """Load the cached per-test durations, if there are any."""
+    try:
+        return dict(json.loads(TEST_DURATIONS_FILE.read_text()))
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_test_durations(*paths: Path) -> Dict[str, float]:
+    """
+    Merge durations recorded by pytest (--store-durations) into the cache.
+
+    Returns the durations recorded by this run.
+    """
+    recorded: Dict[str, float] = {}
+    for path in paths:
+        if path.exists():
+            recorded.update(json.loads(path.read_text()))
+    durations = _load_test_durations()
+    durations.update(recorded)
+    TEST_DURATIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = TEST_DURATIONS_FILE.with_suffix(f".{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(durations, indent=2, sort_keys=True))
+    os.replace(tmp_file, TEST_DURATIONS_FILE)
+    return recorded
+
+
+def _record_test_history(session: Session, durations: Dict[str, float]) -> None:
+    """Append a run's test durations to the history database."""
+    if not durations:
+        return
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+        check=False,
+    )
+    commit = result.stdout.strip() if result.returncode == 0 else None
+    python = str(session.python or platform.python_version())
+    # Concurrent test sessions wait for each other's writes
+    with sqlite3.connect(str(TEST_HISTORY_FILE), timeout=60) as db:
+        db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                time REAL NOT NULL,
+                git_commit TEXT,
+                python TEXT NOT NULL,
+                session TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS durations (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                test_id TEXT NOT NULL,
+                duration REAL NOT NULL,
+                PRIMARY KEY (run_id, test_id)
+            );
+            """
+        )
+        run_id = db.execute(
+            "INSERT INTO runs (time, git_commit, python, session) VALUES (?, ?, ?, ?)",
+            (time.time(), commit, python, session.name),
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO durations (run_id, test_id, duration) VALUES (?, ?, ?)",
+            [(run_id, test_id, duration) for test_id, duration in durations.items()],
+        )
+    db.close()
+
+
+def _partition_tests(
+    test_ids: List[str], durations: Dict[str, float], workers: int
+) -> List[List[str]]:
+    """
+    Split tests into (at most) `workers` groups of roughly equal total duration.
+
+    Uses the longest-processing-time-first heuristic. Tests without a recorded
+    duration are assumed to take the mean of the known durations. Tests keep
+    their collection order within each group.
+    """
+    known = [durations[test_id] for test_id in test_ids if test_id in durations]
+    default = statistics.mean(known) if known else 1.0
+    order = {test_id: index for index, test_id in enumerate(test_ids)}
+    groups: List[List[str]] = [[] for _ in range(workers)]
+    loads = [(0.0, index) for index in range(workers)]
+    for test_id in sorted(
+        test_ids, key=lambda test_id: durations.get(test_id, default), reverse=True
+    ):
+        load, index = heapq.heappop(loads)
+        groups[index].append(test_id)
+        heapq.heappush(loads, (load + durations.get(test_id, default), index))
+    return [sorted(group, key=order.__getitem__) for group in groups if group]
+
+
+def _test_workers() -> int:
+    """Get the number of parallel test workers requested via $TEST_WORKERS."""
+    workers = os.environ.get("TEST_WORKERS", "1")
+    if workers == "auto":
+        return os.cpu_count() or 1
+    return int(workers)
+
+
+def _coverage_mode() -> str:
+    """Get the coverage mode requested via $TEST_COVERAGE."""
+    mode = os.environ.get("TEST_COVERAGE", "branch")
+    if mode not in COVERAGE_MODES:
+        raise ValueError(f"TEST_COVERAGE must be one of {COVERAGE_MODES}, not {mode}")
+    return mode
+
+
+def _test_argv() -> List[str]:
+    """
+    Get the argv that runs pytest under the requested coverage mode.
+
+    - branch: branch coverage, with every test's lines recorded under its own
+      context (which `inv test` builds the test index from).
+    - sysmon: line coverage, using the much cheaper sys.monitoring based core
+      on python 3.12+. That core only records a line the first time it runs,
+      so per-test contexts are incomplete.
+    - off: no coverage at all.
+    """
+    mode = _coverage_mode()
+    if mode == "off":
+        return ["python", "-m", "pytest"]
+    argv = ["coverage", "run", "-p"]
+    if mode == "branch":
+        argv.append("--branch")
+    return [*argv, "-m", "pytest"]
+
+
+def _coverage_env(session: Session) -> Dict[str, str]:
+    """Get the env vars selecting coverage's core for the requested mode."""
+    mode = _coverage_mode()
+    if mode == "branch":
+        # sys.monitoring (the default core from python 3.14) would lose the
+        # per-test contexts, so stick to the tracing core.
+        return {"COVERAGE_CORE": "ctrace"}
+    python = str(session.python or platform.python_version())
+    version = tuple(int(part) for part in python.split(".")[:2])
+    if mode == "sysmon" and version >= (3, 12):
+        return {"COVERAGE_CORE": "sysmon"}
+    return {}
+
+
+def _memory_report_args(session: Session, suffix: str = "") -> List[str]:
+    """Get the pytest args to write a memory report, if one was requested."""
+    if not os.environ.get("TEST_MEMORY"):
+        return []
+    return [f"--memory-report={MEMORY_REPORT_DIR / f'{session.name}{suffix}.txt'}"]
+
+
+def _start_test_worker(
+    session: Session, tmp_dir: Path, index: int, test_ids: List[str]
+) -> "subprocess.Popen[bytes]":
+    """
+    Start a worker that runs the given tests (under coverage, if enabled).
+
+    The worker's output is written to a log file rather than a pipe, so a
+    worker can't block on a full pipe while another one is being waited on.
+    """
+    select_file = tmp_dir / f"worker-{index}.tests"
+    select_file.write_text("\n".join(test_ids))
+    bin_dir = str(session.bin)
+    env = {key: value for key, value in session.env.items() if value is not None}
+    env = dict(os.environ, **env)
+    env["PATH"] = os.pathsep.join([bin_dir, env.get("PATH", "")])
+    env.update(_coverage_env(session))
+    program, *args = _test_argv()
+    argv = [
+        shutil.which(program, path=bin_dir) or program,
+        *args,
+        f"--select-from={select_file}",
+        f"--store-durations={tmp_dir / f'worker-{index}.durations'}",
+        *_memory_report_args(session, f"-worker-{index}"),
+        *session.posargs,
+    ]
+    with open(tmp_dir / f"worker-{index}.log", "w") as log_file:
+        return subprocess.Popen(  # nosec pylint:disable=R1732
+            argv, env=env, stdout=log_file, stderr=subprocess.STDOUT
+        )
+
+
+def _run_test_workers(session: Session, workers: int) -> None:
+    """Run the tests spread across several concurrent workers."""
+    collected = session.run(
+        "python", "-m", "pytest", "--collect-only", "-q", *session.posargs, silent=True
+    )
+    if not isinstance(collected, str):  # session.run was skipped
+        return
+    test_ids = [line for line in collected.splitlines() if "::" in line]
+    groups = _partition_tests(test_ids, _load_test_durations(), workers)
+    session.log(f"Running {len(test_ids)} tests across {len(groups)} workers")
+
+    tmp_dir = Path(session.create_tmp())
+    processes = [
+        _start_test_worker(session, tmp_dir, index, group)
+        for index, group in enumerate(groups)
+    ]
+    failed = []
+    for index, process in enumerate(processes):
+        if process.wait() != 0:
+            failed.append(index)
+        output = (tmp_dir / f"worker-{index}.log").read_text(errors="replace")
+        for line in output.splitlines():
+            print(f"[worker {index}] {line}")
+    durations = _update_test_durations(
+        *(tmp_dir / f"worker-{index}.durations" for index in range(len(groups)))
+    )
+    _record_test_history(session, durations)
+    if failed:
+        session.error(f"Test workers failed: {failed}")
+
+
 @nox_poetry.session(python=SUPPORTED_PYTHONS)
 def test(session: Session) -> None:
-    """Run the unit tests."""
+    """
+    Run the unit tests.
+
+    Positional arguments are passed through to pytest. Set $TEST_MEMORY to trace
+    every test's allocations and write a report to .pytest_cache/memory/. Set
+    $TEST_COVERAGE to choose how coverage is measured, see _test_argv().
+    """
     # Remove the coverage file if it exists
     coverage_file = Path(".coverage")
     if coverage_file.exists():
         coverage_file.unlink()
 
-    session.install(".[tests]")
-    session.run("coverage", "run", "-p", "--branch", "-m", "pytest")
-    session.notify("coverage")
+    # tests/test_tasks.py tests tasks/, which imports invoke and toml
+    _install(session, ".[tests]", "invoke", "toml")
+    workers = _test_workers()
+    if workers > 1:
+        _run_test_workers(session, workers)
+    else:
+        durations_file = Path(session.create_tmp()) / "durations.json"
+        session.run(
+            *_test_argv(),
+            f"--store-durations={durations_file}",
+            *_memory_report_args(session),
+            *session.posargs,
+            env=_coverage_env(session),
+        )
+        _record_test_history(session, _update_test_durations(durations_file))
+    # When test sessions are run concurrently (see `inv test --parallel`) the
+    # caller combines coverage once, after all of them have finished.
+    if not os.environ.get("DEFER_COVERAGE") and _coverage_mode() != "off":
+        session.notify("coverage")
 
 
 @nox_poetry.session
 def coverage(session: Session) -> None:
     """Generate combined coverage metrics."""
-    session.install("coverage[toml]")
+    if not any(Path().glob(".coverage.*")):
+        session.skip("No coverage data to combine")
+    _install(session, "coverage[toml]")
     session.run("coverage", "combine")
     session.run("coverage", "report")
 
 
+@nox_poetry.session
+def bench(session: Session) -> None:
+    """Run the benchmarks and compare them against the saved baseline."""
+    _install(session, ".")
+    session.run("python", "-m", "benchmarks", *session.posargs)
+
+
+{% if cookiecutter.compile_with_mypyc == "y" -%}
+def _compiled_extensions(wheel: Path) -> List[str]:
+    """List the compiled extension modules in a wheel."""
+    with zipfile.ZipFile(wheel) as archive:
+        return [name for name in archive.namelist() if name.endswith((".so", ".pyd"))]
+
+
+@nox_poetry.session
+def mypyc(session: Session) -> None:
+    """
+    Compare the mypyc compiled build against the pure Python build.
+
+    The tests and benchmarks are run against a wheel built with and without
+    mypyc, then the speedup of each is reported. Positional arguments are
+    passed through to the benchmarks.
+    """
+    _install(session, "build", ".[tests]")
+    tmp_dir = Path(session.create_tmp())
+    test_times: Dict[str, float] = {}
+    benchmarks: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for variant, env in (("pure", {"NO_MYPYC": "1"}), ("mypyc", {})):
+        out_dir = tmp_dir / variant
+        shutil.rmtree(out_dir, ignore_errors=True)
+        session.run(
+            "python", "-m", "build", "--wheel", "--outdir", str(out_dir), ".", env=env
+        )
+        wheel = next(out_dir.glob("*.whl"))
+        if variant == "mypyc" and not _compiled_extensions(wheel):
+            session.error(f"{wheel.name} is pure Python, see build_mypyc.py")
+        session.run(
+            "python",
+            "-m",
+            "pip",
+            "install",
+            "--force-reinstall",
+            "--no-deps",
+            str(wheel),
+        )
+        start = time.perf_counter()
+        session.run("pytest", "-q")
+        test_times[variant] = time.perf_counter() - start
+        results_file = out_dir / "benchmarks.json"
+        session.run(
+            "python",
+            "-m",
+            "benchmarks",
+            f"--output={results_file}",
+            f"--baseline={out_dir / 'no-baseline.json'}",
+            *session.posargs,
+        )
+        benchmarks[variant] = json.loads(results_file.read_text())["benchmarks"]
+
+    session.log(
+        f"tests: {test_times['pure']:.2f}s -> {test_times['mypyc']:.2f}s"
+        f" ({test_times['pure'] / test_times['mypyc']:.2f}x speedup)"
+    )
+    for name, stats in sorted(benchmarks["mypyc"].items()):
+        pure_median = benchmarks["pure"][name]["median"]
+        session.log(f"{name}: {pure_median / stats['median']:.2f}x speedup")
+
+
+{% endif -%}
 @nox_poetry.session
 def pre_commit(session: Session) -> None:
     """Run pre-commit against all files."""
-    session.install("pre-commit")
+    _install(session, "pre-commit")
     session.run(
         "python", "-m", "pre_commit", "run", "--all-files", "--show-diff-on-failure"
     )
@@ -74,16 +458,17 @@ def pre_commit(session: Session) -> None:
 @nox_poetry.session
 def pylint(session: Session) -> None:
     """Run pylint."""
-    session.install(".[docs,tests]")
-    session.install("pylint")
-    session.install(*IMPORTED_DEV_REQUIREMENTS)
+    _install(session, ".[docs,tests]")
+    _install(session, "pylint")
+    _install(session, *IMPORTED_DEV_REQUIREMENTS)
     session.run(
         "python",
         "-m",
         "pylint",
         "src/",
         "tests/",
-        "tasks.py",
+        "benchmarks/",
+        "tasks/",
         "noxfile.py",
     )
 
@@ -91,10 +476,10 @@ def pylint(session: Session) -> None:
 @nox_poetry.session
 def mypy(session: Session) -> None:
     """Run mypy."""
-    session.install(".[docs,tests]", *IMPORTED_DEV_REQUIREMENTS)
-    # Can't typecheck tasks.py until the following is fixed:
+    _install(session, ".[docs,tests]", *IMPORTED_DEV_REQUIREMENTS)
+    # Can't typecheck tasks/ until the following is fixed:
     # https://github.com/pyinvoke/invoke/issues/357
-    session.install("mypy")
+    _install(session, "mypy")
     session.run(
         "python",
         "-m",
@@ -104,6 +489,7 @@ def mypy(session: Session) -> None:
         "--scripts-are-modules",
         "src/",
         "tests/",
+        "benchmarks/",
         "noxfile.py",
     )
 
@@ -111,51 +497,131 @@ def mypy(session: Session) -> None:
 @nox_poetry.session
 def safety(session: Session) -> None:
     """Run safety against the installed environment."""
-    session.install(".")
+    _install(session, ".")
     # Update what comes packaged in the venv
     session.run_always("pip", "install", "-U", "pip", "setuptools", "wheel")
-    session.install("safety")
+    _install(session, "safety")
     session.run("python", "-m", "safety", "check")
 
 
+# The files and directories a build of the package depends on
+# (`inv build.dists` reads this too)
+BUILD_INPUTS = ["src", "pyproject.toml", "README.md"
+{%- if cookiecutter.compile_with_mypyc == "y" %}, "build_mypyc.py"{% endif %}]
+# Records the hash of the build inputs the dists in a directory were built from
+BUILD_HASH_FILE = ".build-hash"
+
+
+def _git(*args: str) -> str:
+    """Run a git command, returning its stdout."""
+    return subprocess.run(
+        ["git", *args],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout
+
+
+def hash_build_inputs() -> str:
+    """
+    Hash the paths and contents of the files in BUILD_INPUTS git doesn't ignore.
+
+    Contents are hashed by their git blob ids. `inv build.dists` uses this too,
+    so the dists it builds and the build session agree on what changed.
+    """
+    listed = _git(
+        "ls-files", "--cached", "--others", "--exclude-standard", "--", *BUILD_INPUTS
+    )
+    paths = sorted(path for path in set(listed.splitlines()) if Path(path).is_file())
+    blob_ids = _git("hash-object", "--", *paths).split() if paths else []
+    digest = hashlib.sha256(json.dumps(sorted(zip(paths, blob_ids))).encode())
+{%- if cookiecutter.compile_with_mypyc == "y" %}
+    # Whether the wheel is compiled, see build_mypyc.py
+    digest.update(os.environ.get("NO_MYPYC", "").encode())
+{%- endif %}
+    return digest.hexdigest()
+
+
 @nox_poetry.session
 def build(session: Session) -> None:
-    """Check that the package builds properly."""
-    session.install("build", "twine")
-    with TemporaryDirectory() as tmp_dir:
-        session.run("python", "-m", "build", "--outdir", tmp_dir, ".")
-        session.run("python", "-m", "twine", "check", tmp_dir + "/*")
+    """
+    Check that the package builds properly.
 
+    The sdist and wheel are built concurrently into the session's tmp dir. The
+    check is skipped when the build inputs are unchanged since it last passed.
+    """
+    _install(session, "build", "twine")
+    out_dir = Path(session.create_tmp()) / "dists"
+    hash_file = out_dir / BUILD_HASH_FILE
+    build_hash = hash_build_inputs()
+    if hash_file.exists() and hash_file.read_text() == build_hash:
+        session.log(f"Build inputs unchanged, the dists in {out_dir} already passed")
+        return
+    shutil.rmtree(out_dir, ignore_errors=True)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        builds = {
+            kind: executor.submit(
+                session.run,
+                "python",
+                "-m",
+                "build",
+                f"--{kind}",
+                "--outdir",
+                str(out_dir),
+                ".",
+                silent=True,
+            )
+            for kind in ("sdist", "wheel")
+        }
+        for kind, future in builds.items():
+            output = future.result()
+            if isinstance(output, str):  # session.run wasn't skipped
+                session.log(f"Built the {kind}:\n{output.strip()}")
+    if not any(out_dir.glob("*.whl")):
+        return
+    session.run("python", "-m", "twine", "check", str(out_dir / "*"))
+{%- if cookiecutter.compile_with_mypyc == "y" %}
+    for wheel in out_dir.glob("*.whl"):
+        if _compiled_extensions(wheel):
+            session.log(f"{wheel.name} was compiled with mypyc")
+        else:
+            session.warn(f"{wheel.name} is pure Python, see build_mypyc.py")
+{%- endif %}
+    hash_file.write_text(build_hash)
 
-@nox_poetry.session
-def docs(session: Session) -> None:
-    """Check that the docs build properly."""
-    session.install(".[docs]")
+
+def _sphinx_build(session: Session, builder: str) -> None:
+    """
+    Build the docs from scratch with the given builder, in parallel.
+
+    Nothing is kept between runs, so `-W` fails on the warnings of every
+    document rather than only those changed since the last run. `inv
+    build.docs` keeps a doctree cache for faster local builds instead.
+    """
     with tempfile.TemporaryDirectory() as tmp_dir:
         session.run(
             "sphinx-build",
             "-d",
             f"{tmp_dir}/docs_doctree",
+            "-j",
+            "auto",
             "docs",
             f"{tmp_dir}/docs_out",
             "--color",
             "-W",
-            "-bhtml",
+            f"-b{builder}",
         )
 
 
+@nox_poetry.session
+def docs(session: Session) -> None:
+    """Check that the docs build properly."""
+    _install(session, ".[docs]")
+    _sphinx_build(session, "html")
+
+
 @nox_poetry.session
 def docs_linkcheck(session: Session) -> None:
     """Check there are no dead links in the docs."""
-    session.install(".[docs]")
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        session.run(
-            "sphinx-build",
-            "-d",
-            f"{tmp_dir}/docs_doctree",
-            "docs",
-            f"{tmp_dir}/docs_out",
-            "--color",
-            "-W",
-            "-blinkcheck",
-        )
+    _install(session, ".[docs]")
+    _sphinx_build(session, "linkcheck")
@@ -1,5 +1,26 @@
 """{{ cookiecutter.project_name }}: {{ cookiecutter.short_description }}"""
+import importlib
+from typing import Any, FrozenSet, List
 
 __author__ = "{{ cookiecutter.author }}"
 __email__ = "{{ cookiecutter.email }}"
 __version__ = "{{ cookiecutter.version }}"
+
+# Submodules which are only imported on first attribute access (see PEP 562),
+# so that importing the package stays cheap as it grows. Add expensive
+# submodules here rather than importing them eagerly above.
+_LAZY_SUBMODULES: FrozenSet[str] = frozenset()
+
+
+def __getattr__(name: str) -> Any:
+    """Import lazy submodules on first access."""
+    if name in _LAZY_SUBMODULES:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module  # Skip __getattr__ on subsequent access
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    """List the module's attributes, including lazy submodules."""
+    return sorted(set(globals()) | _LAZY_SUBMODULES)
@@ -0,0 +1,329 @@
+"""
+Low overhead instrumentation for hot paths: timers, counters and histograms.
+
+Instrumentation is disabled unless the ``{{ cookiecutter.module_name.upper() }}_PERF``
+environment variable is set (or :func:`enable` is called). While disabled
+:func:`timer` returns a shared no-op context manager, the decorators return the
+decorated function unchanged and recording functions return immediately, so
+instrumented code runs at (very nearly) full speed::
+
+    from {{ cookiecutter.module_name }} import _perf
+
+    @_perf.timed("parse_seconds")
+    def parse(data): ...
+
+    def handle(request):
+        _perf.increment("requests")
+        with _perf.timer("handle_seconds"):
+            ...
+
+Note that the decorators check whether instrumentation is enabled when they are
+applied, not when the decorated function is called.
+
+Snapshots of everything recorded can be dumped as JSON or in the Prometheus
+text format. Set ``{{ cookiecutter.module_name.upper() }}_PERF_DUMP`` to a path to
+write one when the process exits (Prometheus format if the path ends with
+``.prom``, JSON otherwise).
+"""
+import atexit
+import bisect
+import functools
+import json
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Union, cast
+
+ENV_VAR = "{{ cookiecutter.module_name.upper() }}_PERF"
+DUMP_ENV_VAR = "{{ cookiecutter.module_name.upper() }}_PERF_DUMP"
+
+# Upper bounds of the default histogram buckets, suited to timings in seconds
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_enabled = bool(os.environ.get(ENV_VAR))
+
+
+class Counter:  # pylint:disable=R0903
+    """A thread-safe monotonically increasing counter."""
+
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        """Start counting from zero."""
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the counter."""
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """A thread-safe histogram of observed values, with fixed buckets."""
+
+    __slots__ = ("_lock", "buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Count observations into buckets with the given upper bounds."""
+        self._lock = threading.Lock()
+        self.buckets = tuple(sorted(buckets))
+        # The last count is for observations above the largest bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record an observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the count, sum and cumulative bucket counts."""
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.sum
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            buckets[_format_bound(bound)] = cumulative
+        return {"count": count, "sum": total, "buckets": buckets}
+
+
+class Registry:
+    """A thread-safe collection of named counters and histograms."""
+
+    def __init__(self) -> None:
+        """Start with no metrics."""
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Counter] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        """Get the counter called name, creating it if required."""
+        counter = self.counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self.counters.setdefault(name, Counter())
+        return counter
+
+    def histogram(
+        self, name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get the histogram called name, creating it if required."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(buckets))
+        return histogram
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current value of every metric."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        return {
+            "counters": {name: c.value for name, c in sorted(counters.items())},
+            "histograms": {
+                name: h.snapshot() for name, h in sorted(histograms.items())
+            },
+        }
+
+    def reset(self) -> None:
+        """Remove every metric."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+REGISTRY = Registry()
+
+
+class _Timer:
+    """Record the time spent in a with block into a histogram."""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(perf_counter() - self._start)
+
+
+class _NoopTimer:
+    """A stand-in for _Timer while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def enable() -> None:
+    """Enable instrumentation."""
+    global _enabled  # pylint:disable=W0603
+    _enabled = True
+
+
+def disable() -> None:
+    """Disable instrumentation."""
+    global _enabled  # pylint:disable=W0603
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Check whether instrumentation is enabled."""
+    return _enabled
+
+
+def timer(
+    name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+) -> Union[_Timer, _NoopTimer]:
+    """Time a with block, recording the seconds taken in the histogram name."""
+    if not _enabled:
+        return _NOOP_TIMER
+    return _Timer(REGISTRY.histogram(name, buckets))
+
+
+def timed(name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Callable[[F], F]:
+    """Time each call of the decorated function in the histogram name."""
+
+    def decorate(func: F) -> F:
+        if not _enabled:
+            return func
+        histogram = REGISTRY.histogram(name, buckets)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - start)
+
+        return cast(F, wrapper)
+
+    return decorate
+
+
+def counted(name: str) -> Callable[[F], F]:
+    """Count the calls of the decorated function in the counter name."""
+
+    def decorate(func: F) -> F:
+        if not _enabled:
+            return func
+        counter = REGISTRY.counter(name)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            counter.inc()
+            return func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorate
+
+
+def increment(name: str, amount: float = 1.0) -> None:
+    """Increment the counter name."""
+    if _enabled:
+        REGISTRY.counter(name).inc(amount)
+
+
+def observe(
+    name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+) -> None:
+    """Record an observation in the histogram name."""
+    if _enabled:
+        REGISTRY.histogram(name, buckets).observe(value)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Get the current value of every metric."""
+    return REGISTRY.snapshot()
+
+
+def reset() -> None:
+    """Remove every metric."""
+    REGISTRY.reset()
+
+
+def to_json() -> str:
+    """Render a snapshot as JSON."""
+    return json.dumps(snapshot(), indent=2, sort_keys=True)
+
+
+def to_prometheus(namespace: str = "{{ cookiecutter.module_name }}") -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    current = snapshot()
+    lines: List[str] = []
+    for name, value in current["counters"].items():
+        metric = _metric_name(namespace, name) + "_total"
+        lines.extend([f"# TYPE {metric} counter", f"{metric} {value!r}"])
+    for name, histogram in current["histograms"].items():
+        metric = _metric_name(namespace, name)
+        lines.append(f"# TYPE {metric} histogram")
+        for bound, count in histogram["buckets"].items():
+            label = '{le="' + bound + '"}'
+            lines.append(f"{metric}_bucket{label} {count}")
+        lines.append(f"{metric}_sum {histogram['sum']!r}")
+        lines.append(f"{metric}_count {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: Union[str, Path]) -> None:
+    """Write a snapshot to path, in Prometheus format if it ends with .prom."""
+    path = Path(path)
+    path.write_text(to_prometheus() if path.suffix == ".prom" else to_json())
+
+
+def _format_bound(bound: float) -> str:
+    """Format a bucket's upper bound as Prometheus does."""
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+def _metric_name(namespace: str, name: str) -> str:
+    """Make a valid Prometheus metric name."""
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", f"{namespace}_{name}")
+
+
+if os.environ.get(DUMP_ENV_VAR):
+    atexit.register(dump, os.environ[DUMP_ENV_VAR])
@@ -0,0 +1,75 @@
+"""Development tasks for {{ cookiecutter.project_name }}."""
+from invoke import Collection, task
+
+from .build import build_coverage_report, build_dists, build_zipapp
+from .check import check_all, check_import_time, check_todos
+from .clean import clean
+from .common import echo, run_argv
+from .docs import build_docs, build_docs_cache, serve_docs
+from .lint import format_, lint
+from .profiling import profile
+from .report import report_slow_tests
+from .testing import bench, test
+
+
+@task(pre=[test, lint, build_dists])
+def release(ctx, prod=False):
+    """Perform a release to pypi."""
+    argv = ["python", "-m", "twine", "upload"]
+    if not prod:
+        echo("Uploading to test.pypi")
+        argv.extend(["--repository-url", "https://test.pypi.org/legacy"])
+    else:
+        echo("--prod flag present. Uploading to pypi")
+    argv.append("./dist/*")
+    run_argv(ctx, argv)
+    echo("Upload complete")
+
+
+# Make implicit root explicit
+ns = Collection()
+# Apply some default configurations
+ns.configure({"run": {"pty": True, "echo": True}})
+
+
+# Root commands
+ns.add_task(release)
+ns.add_task(clean)
+ns.add_task(format_)
+ns.add_task(test)
+ns.add_task(bench)
+ns.add_task(profile)
+ns.add_task(lint)
+
+
+# Define the "build" subcommand
+build_ns = Collection("build")
+build_ns.add_task(build_dists, default=True)
+build_ns.add_task(build_docs)
+build_ns.add_task(build_docs_cache)
+build_ns.add_task(build_coverage_report)
+build_ns.add_task(build_zipapp)
+
+
+# Define the "check" subcommand
+check_ns = Collection("check")
+check_ns.add_task(check_all)
+check_ns.add_task(check_todos)
+check_ns.add_task(check_import_time)
+
+
+# Define the "report" subcommand
+report_ns = Collection("report")
+report_ns.add_task(report_slow_tests)
+
+
+# Define the "serve" subcommand
+serve_ns = Collection("serve")
+serve_ns.add_task(serve_docs)
+
+
+# Add custom subcommands to root namespace
+ns.add_collection(build_ns)
+ns.add_collection(check_ns)
+ns.add_collection(report_ns)
+ns.add_collection(serve_ns)
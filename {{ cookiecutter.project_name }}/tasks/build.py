@@ -0,0 +1,356 @@
+"""Tasks building dists, zipapps and reports."""
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import statistics
+import subprocess
+import time
+import zipfile
+from pathlib import Path
+from shutil import copytree, rmtree
+from tempfile import TemporaryDirectory
+
+import toml
+from invoke import Exit, task
+
+from .clean import clean_build_dir, clean_dists
+from .common import capture_argv, echo, run_argv, run_argvs_parallel
+from .testing import test
+
+# Records the inputs hash and names of the dists in ./dist, see build_dists()
+BUILD_HASH_FILE = Path("dist") / ".build-hash.json"
+
+
+def import_noxfile():
+    """
+    Import noxfile.py, which defines the build inputs and how they're hashed.
+
+    Invoke only puts tasks/ on sys.path, so it's imported from its path.
+    """
+    spec = importlib.util.spec_from_file_location("noxfile", "noxfile.py")
+    noxfile = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(noxfile)
+    return noxfile
+
+
+@task(name="dists")
+def build_dists(ctx, force=False):
+    """
+    Build distribution artifacts.
+
+    The existing sdist and wheel are reused when nothing in noxfile.py's
+    BUILD_INPUTS has changed since they were built, pass `--force` to rebuild
+    them anyway. Otherwise they're rebuilt from scratch, concurrently.
+    """
+    build_hash = import_noxfile().hash_build_inputs()
+    try:
+        previous = json.loads(BUILD_HASH_FILE.read_text())
+    except (OSError, ValueError):
+        previous = {}
+    if (
+        not force
+        and previous.get("hash") == build_hash
+        and all((Path("dist") / name).is_file() for name in previous["dists"])
+    ):
+        echo(f"Build inputs unchanged, reusing {', '.join(previous['dists'])}")
+        return
+    clean_dists()
+    clean_build_dir()
+    results = run_argvs_parallel(
+        ctx,
+        {
+            kind: ["poetry", "run", "python", "-m", "build", f"--{kind}", "."]
+            for kind in ("sdist", "wheel")
+        },
+        jobs=2,
+    )
+    failed = [kind for kind, result in results.items() if result.failed]
+    if failed:
+        raise Exit(f"Failed to build the {' and '.join(failed)}", code=1)
+    dists = sorted(
+        path.name
+        for pattern in ("*.tar.gz", "*.whl")
+        for path in Path("dist").glob(pattern)
+    )
+    BUILD_HASH_FILE.write_text(json.dumps({"hash": build_hash, "dists": dists}))
+    echo(f"Dists now available in {Path('./dist').resolve()}")
+
+
+def zipapp_build_id(zipapp):
+    """Read the build id shiv embedded in a zipapp."""
+    with zipfile.ZipFile(zipapp) as archive:
+        return json.loads(archive.read("environment.json"))["build_id"]
+
+
+def prune_shiv_cache(zipapp, shiv_root=None):
+    """
+    Remove extracted copies of older builds of a zipapp from shiv's cache.
+
+    Shiv extracts each build of a zipapp into `<root>/<name>_<build id>` on its
+    first run, and never removes them. Build ids are the sha256 of the zipapp's
+    contents, matching them exactly leaves zipapps whose name extends this
+    one's (eg: `app_cli` vs `app`) alone.
+    """
+    root = Path(shiv_root or "~/.shiv").expanduser()
+    if not root.is_dir():
+        return
+    current_build_id = zipapp_build_id(zipapp)
+    name = re.escape(zipapp.name)
+    entry_regex = re.compile(r"^\.?" + name + r"_([0-9a-f]{64})(\.tmp|_lock)?$")
+    for entry in root.iterdir():
+        match = entry_regex.match(entry.name)
+        if not match or match.group(1) == current_build_id:
+            continue
+        if entry.is_dir():
+            rmtree(entry)
+        else:
+            entry.unlink()
+        echo(f"{str(entry)} removed.")
+
+
+def time_zipapp_runs(argv, runs, shiv_root=None):
+    """Time `runs` runs of a zipapp, each with a fresh shiv root if none given."""
+    timings = []
+    for _ in range(runs):
+        with TemporaryDirectory() as tmp_dir:
+            env = dict(os.environ, SHIV_ROOT=shiv_root or tmp_dir)
+            start = time.perf_counter()
+            subprocess.run(  # nosec
+                argv, env=env, check=True, stdout=subprocess.DEVNULL
+            )
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def measure_zipapp_startup(zipapp, python, startup_args, runs):
+    """
+    Report the cold and warm startup latency of a zipapp.
+
+    Cold runs extract the zipapp into an empty shiv root, as happens the first
+    time a build runs on a host. Warm runs reuse an already extracted root.
+    """
+    argv = [python, str(zipapp), *startup_args]
+    cold = time_zipapp_runs(argv, runs)
+    with TemporaryDirectory() as warm_root:
+        time_zipapp_runs(argv, 1, shiv_root=warm_root)  # Extract once
+        warm = time_zipapp_runs(argv, runs, shiv_root=warm_root)
+    echo(f"Startup latency of `{' '.join(argv)}` over {runs} runs:")
+    for label, timings in (("cold", cold), ("warm", warm)):
+        echo(
+            f"  {label}: median {statistics.median(timings) * 1000:.1f}ms,"
+            f" min {min(timings) * 1000:.1f}ms, max {max(timings) * 1000:.1f}ms"
+        )
+
+
+# Cached dependency site-packages and downloaded dists, see build_zipapp()
+ZIPAPP_CACHE_DIR = Path(".zipapp_cache")
+ZIPAPP_WHEELHOUSE = ZIPAPP_CACHE_DIR / "wheelhouse"
+# How many dependency dirs to keep, eg: one per branch or interpreter in use
+ZIPAPP_CACHED_DEPENDENCIES = 3
+
+
+def fill_wheelhouse(ctx, *pip_args):
+    """Download dists into the zipapp wheelhouse."""
+    argv = ["python", "-m", "pip", "download", "--dest", str(ZIPAPP_WHEELHOUSE)]
+    run_argv(ctx, argv + list(pip_args))
+
+
+def install_from_wheelhouse(ctx, target, *pip_args, warn=True):
+    """Install into `target` using only the zipapp wheelhouse, returning success."""
+    argv = [
+        "python",
+        "-m",
+        "pip",
+        "install",
+        "--no-index",
+        "--find-links",
+        str(ZIPAPP_WHEELHOUSE),
+        "--target",
+        str(target),
+    ]
+    return run_argv(ctx, argv + list(pip_args), warn=warn).ok
+
+
+def zipapp_dependencies(ctx, requirements):
+    """
+    Get a site-packages dir holding the zipapp's dependencies.
+
+    It's cached under ZIPAPP_CACHE_DIR, keyed on the exported requirements and
+    the interpreter, so it's only installed again when one of those changes.
+    Installs are made from a local wheelhouse, only downloading into it what's
+    missing, so later builds work offline. Only the ZIPAPP_CACHED_DEPENDENCIES
+    most recently used dependency dirs are kept, so switching between branches
+    or interpreters reuses them.
+    """
+    interpreter = capture_argv(
+        ctx,
+        [
+            "python",
+            "-c",
+            "import sys, sysconfig;"
+            " print(sys.implementation.cache_tag, sysconfig.get_platform())",
+        ],
+    )
+    key = hashlib.sha256(
+        "\0".join([requirements.read_text(), interpreter]).encode()
+    ).hexdigest()
+    deps_root = ZIPAPP_CACHE_DIR / "site-packages"
+    deps_dir = deps_root / key
+    if deps_dir.is_dir():
+        echo(f"Reusing cached dependencies from {deps_dir}")
+        deps_dir.touch()  # Mark it as recently used
+        return deps_dir
+
+    echo(f"Installing dependencies into {deps_dir}")
+    # Install into a temporary dir first, so failed installs are never reused
+    tmp_dir = deps_root / f"{key}.tmp"
+    install_args = ["--no-compile", "--no-deps", "-r", str(requirements)]
+    if tmp_dir.exists():
+        rmtree(tmp_dir)
+    if not install_from_wheelhouse(ctx, tmp_dir, *install_args):
+        rmtree(tmp_dir, ignore_errors=True)
+        fill_wheelhouse(ctx, "--no-deps", "-r", str(requirements))
+        install_from_wheelhouse(ctx, tmp_dir, *install_args, warn=False)
+    os.replace(tmp_dir, deps_dir)
+    prune_zipapp_dependencies(deps_root)
+    return deps_dir
+
+
+def prune_zipapp_dependencies(deps_root):
+    """Remove all but the ZIPAPP_CACHED_DEPENDENCIES most recently used deps dirs."""
+    deps_dirs = sorted(
+        (path for path in deps_root.iterdir() if not path.name.endswith(".tmp")),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for stale_dir in deps_dirs[ZIPAPP_CACHED_DEPENDENCIES:]:
+        rmtree(stale_dir)
+        echo(f"{str(stale_dir)} removed.")
+
+
+@task(name="zipapp", iterable=["startup_arg"])
+def build_zipapp(
+    ctx,
+    command_name=None,
+    executable_name=None,
+    shebang=None,
+    compress=False,
+    precompile=False,
+    python=None,
+    shiv_root=None,
+    prune_cache=False,
+    measure_startup=0,
+    startup_arg=None,
+):  # pylint:disable=R0912,R0913,R0914
+    """
+    Use `shiv` to produce a zipapp that includes the dependencies.
+
+    Shiv leaves bytecode out of the zipapp, so the dependencies are installed
+    without compiling any. Pass `--precompile` to have the zipapp compile all
+    of its bytecode once, when it first extracts itself, so later runs never
+    compile any (otherwise modules are compiled as they're first imported).
+
+    Pass `--shiv-root` to set where the zipapp extracts itself at runtime
+    (default ~/.shiv, overridable via $SHIV_ROOT), and `--prune-cache` to
+    remove extracted copies of previous builds from it.
+
+    Pass `--measure-startup N` to run the zipapp N times with `--python` and
+    report its cold and warm startup latency. Each `--startup-arg` is passed
+    to it (default: `--help` when `--command-name` is given, otherwise a bare
+    package import).
+
+    The dependencies are installed once per set of exported requirements into
+    .zipapp_cache, from a local wheelhouse there, so rebuilds only install the
+    project itself (and work offline). See zipapp_dependencies().
+    """
+    # Defaults
+    if shebang is None:
+        shebang = "/usr/bin/env python3"
+    if python is None:
+        python = "python"
+
+    if executable_name is None:
+        if command_name is not None:
+            # Same name as command
+            executable_name = command_name
+        else:
+            # Same name as project directory
+            executable_name = Path().resolve().name
+
+    # Compute output path
+    dist_dir = Path() / "dist"
+    dist_dir.mkdir(exist_ok=True)
+    output_fname = dist_dir / executable_name
+
+    echo("Creating zipapp with shiv")
+    ZIPAPP_WHEELHOUSE.mkdir(parents=True, exist_ok=True)
+    with TemporaryDirectory() as tmp_dir:
+        # Build a requirements.txt
+        reqs_filepath = Path(tmp_dir) / "requirements.txt"
+        echo(f"Creating requirements.txt at {str(reqs_filepath.resolve())}")
+        run_argv(
+            ctx,
+            [
+                "poetry",
+                "export",
+                "--format=requirements.txt",
+                f"--output={str(reqs_filepath.resolve())}",
+            ],
+        )
+
+        # Build a site-packages dir from the cached dependencies
+        deps_dir = zipapp_dependencies(ctx, reqs_filepath)
+        echo(f"Creating temporary site_packages at {tmp_dir}/site-packages")
+        copytree(str(deps_dir), f"{tmp_dir}/site-packages")
+        project_args = ["--no-compile", "--no-deps", "."]
+        if not install_from_wheelhouse(ctx, f"{tmp_dir}/site-packages", *project_args):
+            # The build backend isn't in the wheelhouse yet
+            build_requires = toml.load("pyproject.toml")["build-system"]["requires"]
+            fill_wheelhouse(ctx, *build_requires)
+            install_from_wheelhouse(
+                ctx, f"{tmp_dir}/site-packages", *project_args, warn=False
+            )
+
+        # Build the shiv argv
+        shiv_cmd = [
+            "poetry",
+            "run",
+            "shiv",
+            "--site-packages",
+            f"{tmp_dir}/site-packages",
+            "-p",
+            shebang,
+            "-o",
+            str(output_fname),
+        ]
+
+        if command_name:
+            shiv_cmd.extend(["-c", command_name])
+        if compress:
+            shiv_cmd.append("--compressed")
+        if shiv_root:
+            shiv_cmd.extend(["--root", shiv_root])
+        if precompile:
+            shiv_cmd.append("--compile-pyc")
+        # Run the shiv command
+        run_argv(ctx, shiv_cmd)
+    echo(f"Created zipapp: {output_fname}")
+
+    if prune_cache:
+        prune_shiv_cache(output_fname, shiv_root)
+    if measure_startup:
+        if not startup_arg:
+            if command_name:
+                startup_arg = ["--help"]
+            else:
+                startup_arg = ["-c", "import {{ cookiecutter.module_name }}"]
+        measure_zipapp_startup(output_fname, python, startup_arg, measure_startup)
+
+
+@task(pre=[test], name="coverage-report")
+def build_coverage_report(ctx):
+    """Build an HTML coverage report."""
+    run_argv(ctx, ["poetry", "run", "coverage", "html"])
+    echo(f"Coverage report available at {str(Path('./htmlcov').resolve())}")
@@ -0,0 +1,194 @@
+"""Tasks checking the project beyond the tests."""
+import os
+import re
+import statistics
+from typing import Dict, List, Set
+
+import toml
+from invoke import Exit, task
+
+from .clean import clean_coverage
+from .common import echo, list_nox_sessions, run_argv, run_argvs_parallel
+
+
+@task(name="todos")
+def check_todos(ctx):
+    """Check for `#TODO` comments in the code."""
+    argv = [
+        "poetry",
+        "run",
+        "pylint",
+        "--disable=all",
+        "--enable=W0511",
+        "src",
+        "tests",
+    ]
+    run_argv(ctx, argv)
+
+
+# Nox sessions which must run after (all parametrizations of) other sessions
+NOX_SESSION_DEPENDENCIES = {
+    "coverage": {"test"},
+}
+
+# Nox sessions which rewrite files (eg: pre-commit's formatters), every other
+# session runs after them (even if they fail) rather than reading files while
+# they're being rewritten
+FILE_MODIFYING_NOX_SESSIONS = {"pre_commit"}
+
+
+@task(name="all")
+def check_all(ctx, jobs=0):
+    """
+    Run all of the default nox sessions, independent ones concurrently.
+
+    Sessions are run `--jobs` at a time (default: one per CPU), respecting
+    the dependencies in NOX_SESSION_DEPENDENCIES, eg: coverage runs once after
+    all the test sessions have finished. The FILE_MODIFYING_NOX_SESSIONS run
+    before all of the others.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    entries = list_nox_sessions(ctx, full=True)
+    if any(entry["name"] == "test" for entry in entries):
+        entries.append({"session": "coverage", "name": "coverage"})
+    sessions = [entry["session"] for entry in entries]
+    sessions_by_name: Dict[str, Set[str]] = {}
+    for entry in entries:
+        sessions_by_name.setdefault(entry["name"], set()).add(entry["session"])
+    dependencies = {
+        entry["session"]: {
+            session
+            for name in NOX_SESSION_DEPENDENCIES.get(entry["name"], ())
+            for session in sessions_by_name.get(name, ())
+        }
+        for entry in entries
+    }
+    file_modifying = {
+        session
+        for name in FILE_MODIFYING_NOX_SESSIONS
+        for session in sessions_by_name.get(name, ())
+    }
+    after = {session: file_modifying - {session} for session in sessions}
+
+    # Test sessions would otherwise each notify coverage themselves
+    env = {"DEFER_COVERAGE": "1"}
+    # As in run_test_sessions_parallel(), install serially then run concurrently
+    clean_coverage()
+    run_argv(
+        ctx,
+        ["poetry", "run", "nox", "--install-only", "--sessions", *sessions],
+        env=env,
+    )
+    argv = ["poetry", "run", "nox", "--reuse-existing-virtualenvs", "--no-install"]
+    results = run_argvs_parallel(
+        ctx,
+        {session: [*argv, "--sessions", session] for session in sessions},
+        jobs,
+        env=env,
+        dependencies=dependencies,
+        after=after,
+    )
+    failed = [name for name, result in results.items() if not (result and result.ok)]
+    if failed:
+        raise Exit(f"Failed or skipped sessions: {', '.join(failed)}", code=1)
+
+
+IMPORT_TIME_REGEX = re.compile(r"^import time:\s*(\d+) \|\s*(\d+) \|( +)(\S+)$")
+
+
+def parse_import_times(output):
+    """
+    Parse the output of `python -X importtime` into a forest of imports.
+
+    Each node is a dict with "name", "self" and "cumulative" (microseconds) and
+    "children". Children are listed before (and indented deeper than) the
+    module that imported them.
+    """
+    pending: Dict[int, List[dict]] = {}
+    for line in output.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+        if not match:
+            continue
+        depth = (len(match.group(3)) - 1) // 2
+        node = {
+            "name": match.group(4),
+            "self": int(match.group(1)),
+            "cumulative": int(match.group(2)),
+            "children": pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def print_import_tree(node, medians, shown, depth=0):
+    """Print the nodes in `shown` as a tree, slowest first."""
+    echo(
+        f"{'  ' * depth}{node['name']}: {medians[node['name']] / 1000:.2f}ms"
+        f" (self {node['self'] / 1000:.2f}ms)"
+    )
+    for child in sorted(
+        node["children"], key=lambda child: medians[child["name"]], reverse=True
+    ):
+        if child["name"] in shown:
+            print_import_tree(child, medians, shown, depth + 1)
+
+
+def sample_import_times(ctx, module_name, runs):
+    """
+    Import a module `runs` times with `python -X importtime`.
+
+    Returns the import tree of the last run and every module's cumulative
+    import times (in microseconds) across all runs.
+    """
+    argv = ["poetry", "run", "python", "-X", "importtime", "-c"]
+    argv.append(f"import {module_name}")
+    samples: Dict[str, List[int]] = {}
+    root = None
+    for _ in range(runs):
+        output = run_argv(ctx, argv, hide=True, pty=False, echo=False).stderr
+        roots = [
+            node for node in parse_import_times(output) if node["name"] == module_name
+        ]
+        if not roots:
+            raise Exit(f"{module_name} was not imported, is it installed?", code=1)
+        root = roots[0]
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            samples.setdefault(node["name"], []).append(node["cumulative"])
+            stack.extend(node["children"])
+    return root, samples
+
+
+@task(name="import-time")
+def check_import_time(ctx, runs=5, top=20, budget_ms=None):
+    """
+    Check how long it takes to import the package.
+
+    The package is imported `--runs` times with `python -X importtime`. The
+    `--top` slowest imports (by median cumulative time) are printed as a tree.
+    Fails if the median import time exceeds `--budget-ms`, which defaults to
+    `budget_ms` in the `[tool.import_time]` table of pyproject.toml.
+    """
+    module_name = "{{ cookiecutter.module_name }}"
+    if budget_ms is None:
+        config = toml.load("pyproject.toml").get("tool", {}).get("import_time", {})
+        budget_ms = config.get("budget_ms")
+
+    root, samples = sample_import_times(ctx, module_name, runs)
+    medians = {name: statistics.median(times) for name, times in samples.items()}
+    shown = set(sorted(medians, key=medians.__getitem__, reverse=True)[:top])
+    echo(f"Slowest imports (median cumulative time over {runs} runs):")
+    print_import_tree(root, medians, shown)
+
+    total_ms = medians[module_name] / 1000
+    if budget_ms is None:
+        echo(f"Importing {module_name} took {total_ms:.2f}ms (no budget set)")
+    elif total_ms > float(budget_ms):
+        raise Exit(
+            f"Importing {module_name} took {total_ms:.2f}ms,"
+            f" over the budget of {budget_ms}ms",
+            code=1,
+        )
+    else:
+        echo(f"Importing {module_name} took {total_ms:.2f}ms (budget {budget_ms}ms)")
@@ -0,0 +1,229 @@
+"""The clean task, and the helpers removing individual artifacts."""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shutil import rmtree
+
+from invoke import task
+
+from .common import echo, run_argv
+
+
+def remove_directory(directory, raise_=False):
+    """
+    Remove a directory.
+
+    If raise_ is True and the directory doesn't exist raise an exception.
+    """
+    if not directory.exists():
+        if raise_:
+            raise FileNotFoundError(directory)
+        echo(f"No directory found at {str(directory)}")
+        return
+    rmtree(directory)
+    echo(f"{str(directory)} removed.")
+
+
+def clean_dists():
+    """Remove existing distributions."""
+    dist_dir = Path("./dist").resolve()
+    remove_directory(dist_dir)
+
+
+def clean_docs():
+    """Remove existing docs and the doctree cache."""
+    docs_out_dir = Path("./docs_out").resolve()
+    remove_directory(docs_out_dir)
+    docs_doctree_dir = Path("./docs_doctree").resolve()
+    remove_directory(docs_doctree_dir)
+
+
+# Names to skip removing or recursing into when cleaning compiled artifacts
+# (installed environments and caches kept by `inv clean --no-...` included)
+CLEAN_SKIP_NAMES = {
+    "venv",
+    ".venv",
+    "env",
+    ".env",
+    ".git",
+    ".nox",
+    ".zipapp_cache",
+}
+
+
+def collect_clean_targets(root, top_level_names=(), coverage=False, compiled=False):
+    """
+    Collect paths for `inv clean` to remove in a single pass over the tree.
+
+    Collects the entries of `root` named in `top_level_names`, `.coverage.*`
+    files in `root` if `coverage` is set, and compiled python artifacts
+    (`*.pyc`, `__pycache__`, `*.egg-info`) found recursively if `compiled`
+    is set. Doesn't recurse into anything it collects.
+    """
+    targets = []
+    pending = [root]
+    while pending:
+        dir_ = pending.pop()
+        with os.scandir(dir_) as entries:
+            for entry in entries:
+                name = entry.name
+                if dir_ is root and (
+                    name in top_level_names
+                    or (coverage and name.startswith(".coverage.") and entry.is_file())
+                ):
+                    targets.append(entry)
+                elif name in CLEAN_SKIP_NAMES or not compiled:
+                    continue
+                elif name == "__pycache__" or name.endswith((".pyc", ".egg-info")):
+                    targets.append(entry)
+                elif entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+    return targets
+
+
+# Written into each nox virtualenv by noxfile.py's _install()
+NOX_INSTALL_CACHE_FILE = ".install-cache.json"
+
+
+def collect_stale_nox_envs():
+    """
+    Collect nox virtualenvs whose installs were made from another poetry.lock.
+
+    Virtualenvs without an install cache are stale too.
+    """
+    nox_dir = Path(".nox").resolve()
+    if not nox_dir.is_dir():
+        return []
+    lock = hashlib.sha256(Path("poetry.lock").read_bytes()).hexdigest()
+    stale = []
+    with os.scandir(nox_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                cache = json.loads(
+                    (Path(entry.path) / NOX_INSTALL_CACHE_FILE).read_text()
+                )
+            except (OSError, ValueError):
+                cache = {}
+            if cache.get("lock") != lock:
+                stale.append(entry)
+    return stale
+
+
+def disk_usage(entry):
+    """Count the bytes used by a file, or a directory tree."""
+    if not entry.is_dir(follow_symlinks=False):
+        return entry.stat(follow_symlinks=False).st_size
+    with os.scandir(entry.path) as entries:
+        return sum(disk_usage(child) for child in entries)
+
+
+def remove_entry(entry):
+    """Remove a file or directory tree."""
+    if entry.is_dir(follow_symlinks=False):
+        rmtree(entry.path)
+    else:
+        os.unlink(entry.path)
+
+
+def remove_targets(targets, dry_run=False):
+    """Remove the collected targets on a thread pool, or just report them."""
+    if dry_run:
+        with ThreadPoolExecutor() as executor:
+            reclaimable = sum(executor.map(disk_usage, targets))
+        for path in sorted(target.path for target in targets):
+            echo(f"Would remove {path}")
+        echo(f"Would remove {len(targets)} paths, reclaiming {reclaimable:,} bytes.")
+        return
+    with ThreadPoolExecutor() as executor:
+        # Consume the iterator so exceptions are raised
+        list(executor.map(remove_entry, targets))
+    echo(f"Removed {len(targets)} paths.")
+
+
+def clean_coverage():
+    """Remove the .coverage cache."""
+    # Nox takes care of .coverage on its own
+    # We just don't want extras in our coverage combine call.
+    for coverage_cache_file in Path().glob(".coverage.*"):
+        if coverage_cache_file.exists() and coverage_cache_file.is_file():
+            coverage_cache_file.unlink()
+            echo(f"{str(coverage_cache_file)} removed.")
+
+
+def clean_build_dir():
+    """Remove the build directory."""
+    build_directory = Path("./build").resolve()
+    remove_directory(build_directory)
+
+
+# Long flags only: with this many, automatic short flags are arbitrary and
+# collide (eg: `-h` for --benchmarks, and none left for --dry-run)
+@task(auto_shortflags=False)
+def clean(
+    ctx,
+    dists=True,
+    docs=True,
+    docs_cache=True,
+    compiled=True,
+    nox=True,
+    mypy=True,
+    pylint=True,
+    pytest=True,
+    coverage=True,
+    coverage_report=True,
+    build_directory=True,
+    benchmarks=True,
+    profiles=True,
+    test_history=False,
+    zipapp_cache=False,
+    stale_nox=False,
+    dry_run=False,
+):  # pylint:disable=W0613,R0913,R0914
+    """
+    Clean up all caches and generated artifacts.
+
+    Note that the default is to clean _everything_ except the test history and
+    the zipapp dependency cache, and if you would like to preserve any
+    artifacts/caches you should pass the corresponding `--no-...` flag to this
+    command. Pass `--test-history` or `--zipapp-cache` to remove those too.
+
+    Pass `--stale-nox` to only remove the nox virtualenvs that were installed
+    from an outdated poetry.lock, keeping the up to date ones.
+
+    Everything to be removed is collected in a single pass over the tree and
+    then removed concurrently. Pass `--dry-run` to only report what would be
+    removed and how much space that would reclaim.
+    """
+    directories = {
+        "dist": dists,
+        "docs_out": docs,
+        "docs_doctree": docs,
+        ".docs_cache": docs_cache,
+        ".nox": nox and not stale_nox,
+        ".mypy_cache": mypy,
+        ".pylint_cache": pylint,
+        ".pytest_cache": pytest,
+        "htmlcov": coverage_report,
+        "build": build_directory,
+        ".benchmarks": benchmarks,
+        "profiles": profiles,
+        ".test-history.sqlite": test_history,
+        ".zipapp_cache": zipapp_cache,
+    }
+    echo(f"Collecting artifacts to clean from {str(Path().resolve())}...")
+    targets = collect_clean_targets(
+        os.getcwd(),
+        top_level_names={name for name, enabled in directories.items() if enabled},
+        coverage=coverage,
+        compiled=compiled,
+    )
+    if stale_nox:
+        targets.extend(collect_stale_nox_envs())
+    if mypy and not dry_run and Path(".dmypy.json").exists():
+        # Stop the `inv lint --fast` daemon before its cache is removed
+        run_argv(ctx, ["poetry", "run", "dmypy", "stop"], warn=True)
+    remove_targets(targets, dry_run=dry_run)
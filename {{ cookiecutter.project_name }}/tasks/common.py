@@ -0,0 +1,194 @@
+"""Helpers shared by the development tasks."""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from shlex import quote
+
+# Change the CWD to the repo root.
+os.chdir(Path(__file__).resolve().parents[1])
+
+
+# Differentiate our output from called app output.
+ECHO_PREFIX = "=> "
+
+
+def echo(msg):
+    """Wrap print to prepend a prefix."""
+    print(ECHO_PREFIX + str(msg))
+
+
+echo(f"Current Working Directory: {str(Path('.').resolve())}")
+
+
+def get_posargs():
+    """Get tox style "posargs" that follow "--" on the CLI."""
+    try:
+        return sys.argv[sys.argv.index("--") + 1 :]
+    except (ValueError, IndexError):
+        return []
+
+
+def run_argv(ctx, argv, warn=False, **kwargs):
+    """Run a constructed argv via the provided context."""
+    return ctx.run(" ".join([quote(x) for x in argv]), warn=warn, **kwargs)
+
+
+class PrefixedStream:
+    """A write-only stream that prints complete lines with a prefix."""
+
+    # Shared between streams so lines from different commands don't interleave
+    lock = threading.Lock()
+
+    def __init__(self, prefix):
+        """Prefix each line with `prefix`."""
+        self.prefix = prefix
+        self.buffer = ""
+
+    def write(self, data):
+        """Print any complete lines, buffer the rest."""
+        *lines, self.buffer = (self.buffer + data).split("\n")
+        if lines:
+            with self.lock:
+                print("\n".join(self.prefix + line for line in lines), flush=True)
+
+    def flush(self):
+        """Print any incomplete line left in the buffer."""
+        if self.buffer:
+            self.write("\n")
+
+
+def run_argvs_parallel(
+    ctx, argvs, jobs, env=None, dependencies=None, after=None
+):  # pylint:disable=R0913,R0914
+    """
+    Run several named argvs concurrently, at most `jobs` at a time.
+
+    `argvs` maps a name to an argv, and `dependencies` optionally maps a name to
+    the names which must finish successfully before it starts (if any of them
+    fail it is skipped). `after` likewise maps a name to the names which must
+    finish, successfully or not, before it starts. Output is streamed with each
+    line prefixed by the command's name, and a summary of wall time per command
+    is printed at the end. Returns a mapping of names to results (None for
+    skipped commands).
+    """
+    dependencies = dependencies or {}
+    after = after or {}
+    waiting = {
+        name: set(dependencies.get(name, ())).union(after.get(name, ())) & set(argvs)
+        for name in argvs
+    }
+    results = {}
+    durations = {}
+
+    def run_one(name):
+        stream = PrefixedStream(f"[{name}] ")
+        start = time.perf_counter()
+        result = run_argv(
+            ctx,
+            argvs[name],
+            warn=True,
+            pty=False,
+            echo=False,
+            env=env,
+            out_stream=stream,
+            err_stream=stream,
+        )
+        stream.flush()
+        durations[name] = time.perf_counter() - start
+        echo(f"{name} finished with exit code {result.exited}")
+        return result
+
+    echo(f"Running {len(argvs)} commands, {jobs} at a time: {', '.join(argvs)}")
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while waiting or running:
+            for name, deps in list(waiting.items()):
+                if not deps.issubset(results):
+                    continue
+                del waiting[name]
+                required = deps.intersection(dependencies.get(name, ()))
+                if any(results[dep] is None or results[dep].failed for dep in required):
+                    echo(f"Skipping {name}, a dependency failed")
+                    results[name] = None
+                else:
+                    running[executor.submit(run_one, name)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[running.pop(future)] = future.result()
+
+    results = {name: results[name] for name in argvs}
+    print_run_summary(results, durations)
+    return results
+
+
+def print_run_summary(results, durations):
+    """Print a table of the status and wall time of each command run."""
+    echo("Summary:")
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        if result is None:
+            echo(f"  {name:<{width}}  {'':>9}  skipped")
+        else:
+            status = "ok" if result.ok else f"failed ({result.exited})"
+            echo(f"  {name:<{width}}  {durations[name]:8.1f}s  {status}")
+
+
+def capture_argv(ctx, argv, warn=False):
+    """Run a constructed argv quietly, returning its stdout."""
+    return run_argv(ctx, argv, warn=warn, hide=True, pty=False, echo=False).stdout
+
+
+def list_nox_sessions(ctx, *selectors, full=False):
+    """
+    List the names of the nox sessions matching the given nox selectors.
+
+    If `full` is set, return nox's full (JSON) description of each session.
+    """
+    argv = ["poetry", "run", "nox", "--list", "--json", *selectors]
+    sessions = json.loads(capture_argv(ctx, argv))
+    if full:
+        return sessions
+    return [entry["session"] for entry in sessions]
+
+
+def changed_files(ctx, since):
+    """
+    List the existing files changed since the ref `since`, untracked included.
+
+    If `since` doesn't resolve, eg: HEAD in a repo without commits yet, every
+    tracked file counts as changed.
+    """
+    argv = ["git", "diff", "--name-only", "--diff-filter=d", since]
+    result = run_argv(ctx, argv, warn=True, hide=True, pty=False, echo=False)
+    if result.ok:
+        diff = result.stdout
+    else:
+        echo(f"Can't diff against {since}, treating every tracked file as changed")
+        diff = capture_argv(ctx, ["git", "ls-files"])
+    untracked = capture_argv(ctx, ["git", "ls-files", "--others", "--exclude-standard"])
+    paths = set(diff.splitlines()) | set(untracked.splitlines())
+    return sorted(path for path in paths if Path(path).is_file())
+
+
+def git_blob_ids(ctx, ref, paths):
+    """Get the git blob ids of paths, either in the working tree or at ref."""
+    if ref is None:
+        paths = [path for path in paths if Path(path).is_file()]
+        if not paths:
+            return {}
+        output = capture_argv(ctx, ["git", "hash-object", *paths])
+        return dict(zip(paths, output.split()))
+    if not paths:
+        return {}
+    output = capture_argv(ctx, ["git", "ls-tree", "-r", ref, "--", *paths], warn=True)
+    blobs = {}
+    for line in output.splitlines():
+        info, _, path = line.partition("\t")
+        blobs[path] = info.split()[2]
+    return blobs
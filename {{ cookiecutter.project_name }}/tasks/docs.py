@@ -0,0 +1,120 @@
+"""Documentation tasks."""
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from invoke import task
+
+from .clean import clean_docs
+from .common import echo, run_argv
+
+
+def document_mtimes(out_dir):
+    """Map each document Sphinx wrote into out_dir to its mtime."""
+    mtimes = {}
+    for dirpath, dirnames, filenames in os.walk(out_dir):
+        # Skip static files, sources, build info, etc.
+        dirnames[:] = [name for name in dirnames if not name.startswith(("_", "."))]
+        for filename in filenames:
+            if not filename.startswith(("_", ".")):
+                path = os.path.join(dirpath, filename)
+                mtimes[os.path.relpath(path, out_dir)] = os.stat(path).st_mtime
+    return mtimes
+
+
+@task(name="docs")
+def build_docs(ctx, clean_=False, buildername="html", jobs="auto"):
+    """
+    Build the documentation.
+
+    Builds are incremental: Sphinx's doctree cache is kept in docs_doctree
+    between builds, so only new or changed documents (including documents
+    autodoc'ing changed modules) are read and written again, `--jobs` at a
+    time. Note that warnings from unchanged documents aren't repeated, so
+    `-W` only fails on those changed since the last build. Pass `--clean` to
+    build from scratch, as the nox docs session always does.
+    """
+    if clean_:
+        clean_docs()
+    docs_dir = Path(".") / "docs_out"
+    docs_dir = docs_dir.resolve()
+    before = document_mtimes(docs_dir)
+    start = time.perf_counter()
+    argv = [
+        "poetry",
+        "run",
+        "sphinx-build",
+        "-d",
+        "docs_doctree",
+        "-j",
+        str(jobs),
+        "docs",
+        "docs_out",
+        "--color",
+        "-W",
+        f"-b{buildername}",
+    ]
+    run_argv(ctx, argv)
+    elapsed = time.perf_counter() - start
+    rebuilt = sorted(
+        name
+        for name, mtime in document_mtimes(docs_dir).items()
+        if before.get(name) != mtime
+    )
+    echo(f"Rebuilt {len(rebuilt)} document(s) in {elapsed:.1f}s: {', '.join(rebuilt)}")
+    echo(f"Docs available in {str(docs_dir)}")
+
+
+@task(name="docs-cache")
+def build_docs_cache(ctx):
+    """
+    Refresh the docs' cached intersphinx inventories and linkcheck results.
+
+    Run this while online to prime .docs_cache, so that docs can be built on
+    machines without network access with the SPHINX_OFFLINE env var set.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        argv = [
+            "poetry",
+            "run",
+            "sphinx-build",
+            "-d",
+            str(Path(tmp_dir) / "doctree"),
+            "docs",
+            str(Path(tmp_dir) / "out"),
+            "--color",
+            "-blinkcheck",
+        ]
+        run_argv(ctx, argv, env={"SPHINX_REFRESH_CACHE": "true"})
+    echo(f"Docs cache refreshed in {Path('./.docs_cache').resolve()}")
+
+
+@task(name="docs", iterable=["additional_dir"])
+def serve_docs(ctx, todos=False, additional_dir=None, open_browser=False):
+    """Serve the docs on localhost:8000. Reload on changes."""
+    argv = ["poetry", "run", "sphinx-autobuild"]
+
+    if open_browser:
+        argv.append("--open-browser")
+
+    # Default additional dirs we want to watch for changes
+    default_additional_dirs = ["src"]
+    for default in default_additional_dirs:
+        additional_dir.append(default)
+
+    # Append append defaults + user specified dirs to argv
+    additional_dir.append("src")
+    for dir_ in additional_dir:
+        argv.append("--watch")
+        argv.append(dir_)
+
+    # sphinx-autobuild positional args
+    argv.append("docs")
+    argv.append("docs/_build/html")
+
+    # See relevant logic in docs/conf.py
+    if todos:
+        os.environ["SPHINX_DISPLAY_TODOS"] = "true"
+
+    run_argv(ctx, argv)
@@ -0,0 +1,175 @@
+"""Linting and formatting tasks."""
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+
+from invoke import Exit, task
+
+from .common import changed_files, echo, run_argv
+
+# Paths checked by the nox mypy and pylint sessions, see noxfile.py
+MYPY_TARGETS = ["src/", "tests/", "benchmarks/", "noxfile.py"]
+PYLINT_TARGETS = ["src/", "tests/", "benchmarks/", "tasks/", "noxfile.py"]
+
+PYLINT_CACHE_FILE = Path(".pylint_cache") / "results.json"
+
+
+def in_targets(path, targets):
+    """Check whether `path` is one of, or inside one of, `targets`."""
+    return any(
+        path == target or (target.endswith("/") and path.startswith(target))
+        for target in targets
+    )
+
+
+def pylint_cache_key(path, config_hash):
+    """Hash a file's contents along with the pylint configuration."""
+    return hashlib.sha256(config_hash.encode() + Path(path).read_bytes()).hexdigest()
+
+
+def run_fast_pylint(ctx, paths):
+    """
+    Run pylint on `paths`, skipping files unchanged since they last passed.
+
+    Files are cached by content, so a file that only fails because of a change
+    to something it imports is only caught by a full `inv lint`.
+    """
+    config_hash = hashlib.sha256(Path(".pylintrc").read_bytes()).hexdigest()
+    try:
+        cache = json.loads(PYLINT_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    keys = {path: pylint_cache_key(path, config_hash) for path in paths}
+    stale = [path for path in paths if cache.get(path) != keys[path]]
+    echo(f"pylint: {len(paths) - len(stale)} of {len(paths)} file(s) cached")
+    if not stale:
+        return True
+    result = run_argv(
+        ctx, ["poetry", "run", "pylint", "--jobs", "0", *stale], warn=True
+    )
+    failed = {
+        line.split(":", 1)[0]
+        for line in result.stdout.splitlines()
+        if re.match(r"^[^\s:]+:\d+:\d+: ", line)
+    }
+    cache.update({path: keys[path] for path in stale if path not in failed})
+    for path in failed:
+        cache.pop(path, None)
+    PYLINT_CACHE_FILE.parent.mkdir(exist_ok=True)
+    PYLINT_CACHE_FILE.write_text(json.dumps(cache, indent=2, sort_keys=True))
+    return result.ok
+
+
+def lint_fast(ctx, since, daemon):
+    """
+    Lint the files changed since the ref `since`, printing the time per tool.
+
+    mypy checks the whole project, as changes can break other modules, but
+    only rechecks what changed: in a dmypy daemon kept running between runs
+    if `daemon` is set, otherwise from mypy's incremental cache. pylint and
+    the other pre-commit hooks only check the changed files.
+    """
+    paths = changed_files(ctx, since)
+    if not paths:
+        echo(f"No files changed since {since}")
+        return
+    python_paths = [path for path in paths if path.endswith(".py")]
+    mypy_argv = ["--scripts-are-modules", *MYPY_TARGETS]
+    if daemon:
+        # poetry run swallows the first "--", dmypy needs the second
+        mypy_argv = ["--", "dmypy", "run", "--", *mypy_argv]
+    else:
+        mypy_argv = ["mypy", "--incremental", *mypy_argv]
+    checks = {
+        "pre-commit": lambda: run_argv(
+            ctx,
+            ["poetry", "run", "pre-commit", "run", "--files", *paths],
+            warn=True,
+            env={"SKIP": "mypy,pylint"},
+        ).ok,
+    }
+    if any(in_targets(path, MYPY_TARGETS) for path in python_paths):
+        checks["mypy"] = lambda: run_argv(
+            ctx, ["poetry", "run", *mypy_argv], warn=True
+        ).ok
+    pylint_paths = [path for path in python_paths if in_targets(path, PYLINT_TARGETS)]
+    if pylint_paths:
+        checks["pylint"] = lambda: run_fast_pylint(ctx, pylint_paths)
+    durations = {}
+    failed = []
+    for tool, check in checks.items():
+        start = time.perf_counter()
+        if not check():
+            failed.append(tool)
+        durations[tool] = time.perf_counter() - start
+    for tool, duration in durations.items():
+        status = "failed" if tool in failed else "passed"
+        echo(f"{tool:<10} {status} in {duration:.2f}s")
+    if failed:
+        raise Exit(f"Lint failed: {', '.join(failed)}", code=1)
+
+
+@task
+def lint(ctx, fast=False, since="HEAD", daemon=True):
+    """
+    Run pre-commit against all files.
+
+    Pass `--fast` to only lint the files changed since `--since` (default:
+    HEAD, ie: uncommitted changes) and print how long each tool took. Fast
+    runs keep a dmypy daemon running for the next run, pass `--no-daemon` to
+    use mypy's incremental cache instead. `inv clean --mypy` stops the daemon.
+    """
+    if fast:
+        lint_fast(ctx, since, daemon)
+        return
+    argv = [
+        "poetry",
+        "run",
+        "pre-commit",
+        "run",
+        "--all-files",
+        "--show-diff-on-failure",
+    ]
+    run_argv(ctx, argv, warn=False)
+
+
+# The pre-commit hooks that rewrite files, in .pre-commit-config.yaml's order
+# (which is the order pre-commit runs them in)
+FORMATTERS = (
+    "black",
+    "blacken-docs",
+    "isort",
+    "end-of-file-fixer",
+    "trailing-whitespace",
+)
+
+PRE_COMMIT_HOOK_ID_REGEX = re.compile(r"^\s*-\s+id:\s*(\S+)", re.MULTILINE)
+
+
+@task(name="format")
+def format_(ctx, all_files=False):
+    """
+    Run all the formatters on the files changed since HEAD.
+
+    Changed, staged and untracked files are collected once, then a single
+    pre-commit run applies every formatter to them (skipping the other hooks).
+    Each formatter runs on batches of files in parallel, but the formatters run
+    one after another in config order, as they can rewrite the same files.
+    Pass `--all-files` to format everything.
+    """
+    hook_ids = PRE_COMMIT_HOOK_ID_REGEX.findall(
+        Path(".pre-commit-config.yaml").read_text()
+    )
+    skip = sorted(set(hook_ids).difference(FORMATTERS))
+    argv = ["poetry", "run", "pre-commit", "run", "--show-diff-on-failure"]
+    if all_files:
+        argv.append("--all-files")
+    else:
+        paths = changed_files(ctx, "HEAD")
+        if not paths:
+            echo("No files changed since HEAD")
+            return
+        argv.extend(["--files", *paths])
+    run_argv(ctx, argv, warn=True, env={"SKIP": ",".join(skip)})
@@ -0,0 +1,135 @@
+"""The profiling task, and collapsing its profiles into stacks."""
+import pstats
+import time
+from pathlib import Path
+
+from invoke import Exit, task
+
+from .common import echo, get_posargs, run_argv
+
+PROFILES_DIR = Path("./profiles")
+
+
+def frame_label(func):
+    """Label a pstats function key for use in a collapsed stack."""
+    filename, lineno, name = func
+    if filename == "~":  # Builtins
+        return name
+    return f"{Path(filename).name}:{lineno}({name})"
+
+
+def reachable(callees, start):
+    """Get the functions reachable from `start` in a caller -> callees map."""
+    seen = {start}
+    pending = [start]
+    while pending:
+        for callee, _ in callees.get(pending.pop(), ()):
+            if callee not in seen:
+                seen.add(callee)
+                pending.append(callee)
+    return seen
+
+
+def call_edges(stats):
+    """Map each function in a pstats.Stats to its (callee, time) edges."""
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        # Each caller's entry is (primitive calls, calls, own time, cumulative time)
+        for caller, (_, _, _, edge_time) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_time))
+    return callees
+
+
+def stack_roots(stats, callees):
+    """
+    Choose the functions collapsed stacks start from.
+
+    These are the functions without callers. Cycles (eg: `exec` is called
+    again by importlib for every import) can leave whole call graphs without
+    one, so the function with the most cumulative time among those not reached
+    yet is used as a root too, until every function is reached.
+    """
+    roots = [func for func, entry in stats.stats.items() if not entry[4]]
+    unreached = set(stats.stats)
+    for root in roots:
+        unreached -= reachable(callees, root)
+    while unreached:
+        root = max(unreached, key=lambda func: (stats.stats[func][3], func))
+        roots.append(root)
+        unreached -= reachable(callees, root)
+    return roots
+
+
+def collapse_stacks(stats, min_us=1):
+    """
+    Derive collapsed stacks ("a;b;c <microseconds>") from a pstats.Stats.
+
+    cProfile only records caller -> callee edges, not whole stacks, so each
+    function's time is split between its callers in proportion to the time
+    spent in it via each of them (the same approximation as gprof2dot et al.)
+    Each function's own time is then scaled so that its stacks add up to the
+    own time cProfile recorded for it.
+    """
+    callees = call_edges(stats)
+    # The time flowing into each function across all of its call edges. With
+    # recursion this exceeds its cumulative time, which only counts the
+    # outermost calls.
+    inflow = {
+        func: max(entry[3], sum(edge[3] for edge in entry[4].values()))
+        for func, entry in stats.stats.items()
+    }
+    own_times = {}
+    attributed = {}
+
+    def walk(func, stack, time_in):
+        ratio = time_in / inflow[func] if inflow[func] else 0.0
+        own_time = stats.stats[func][2] * ratio
+        key = ";".join(frame_label(frame) for frame in stack)
+        own_times[key] = (func, own_times.get(key, (func, 0.0))[1] + own_time)
+        attributed[func] = attributed.get(func, 0.0) + own_time
+        for callee, edge_time in callees.get(func, ()):
+            # Don't follow recursion, or paths carrying too little time to show up
+            if callee not in stack and edge_time * ratio * 1e6 >= min_us:
+                walk(callee, stack + [callee], edge_time * ratio)
+
+    for root in stack_roots(stats, callees):
+        walk(root, [root], stats.stats[root][3])
+    collapsed = {}
+    for key, (func, own_time) in own_times.items():
+        scale = stats.stats[func][2] / attributed[func] if attributed[func] else 0.0
+        own_us = round(own_time * scale * 1e6)
+        if own_us >= min_us:
+            collapsed[key] = own_us
+    return collapsed
+
+
+@task
+def profile(ctx, top=20, sort="cumulative"):
+    """
+    Profile a module or script: `inv profile -- <module or script.py> [args]`.
+
+    Writes a cProfile .pstats file, and the collapsed stacks derived from it
+    for flamegraph tools (eg: `flamegraph.pl` or speedscope), to profiles/,
+    then prints the `--top` functions by `--sort` (default: cumulative time).
+    """
+    posargs = get_posargs()
+    if not posargs:
+        raise Exit("Specify what to profile, eg: inv profile -- my_module --arg")
+    target, *args = posargs
+    is_script = target.endswith(".py")
+    stem = Path(target).stem if is_script else target
+    PROFILES_DIR.mkdir(exist_ok=True)
+    base = PROFILES_DIR / f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}"
+    pstats_path = base.with_suffix(".pstats")
+    argv = ["poetry", "run", "python", "-m", "cProfile", "-o", str(pstats_path)]
+    argv.extend([target] if is_script else ["-m", target])
+    argv.extend(args)
+    run_argv(ctx, argv)
+
+    stats = pstats.Stats(str(pstats_path))
+    collapsed_path = base.with_suffix(".collapsed")
+    collapsed = sorted(collapse_stacks(stats).items())
+    collapsed_path.write_text("".join(f"{stack} {us}\n" for stack, us in collapsed))
+    stats.sort_stats(sort).print_stats(int(top))
+    echo(f"Profile written to {pstats_path.resolve()}")
+    echo(f"Collapsed stacks written to {collapsed_path.resolve()}")
@@ -0,0 +1,111 @@
+"""Tasks reporting on the recorded test history."""
+import sqlite3
+import statistics
+from pathlib import Path
+from typing import Dict, List
+
+from invoke import Exit, task
+
+from .common import echo
+
+# Written by noxfile.py's _record_test_history()
+TEST_HISTORY_FILE = Path(".test-history.sqlite")
+
+SPARKLINE_BARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values):
+    """Draw values as a line of bars, with a space for each missing value."""
+    present = [value for value in values if value is not None]
+    if not present:
+        return " " * len(values)
+    low, high = min(present), max(present)
+    scale = (len(SPARKLINE_BARS) - 1) / (high - low) if high > low else 0
+    return "".join(
+        " " if value is None else SPARKLINE_BARS[round((value - low) * scale)]
+        for value in values
+    )
+
+
+def load_test_history(session, runs):
+    """
+    Load the durations of each test over the last `runs` runs of a session.
+
+    Returns the session, its runs as (id, commit) pairs (oldest first) and a
+    map of each test to its durations in those runs (None where it didn't
+    run). `session` defaults to the most recently run session.
+    """
+    if not TEST_HISTORY_FILE.exists():
+        raise Exit(f"No test history found at {TEST_HISTORY_FILE}, run `inv test`.")
+    with sqlite3.connect(str(TEST_HISTORY_FILE)) as db:
+        if session is None:
+            latest = db.execute("SELECT session FROM runs ORDER BY id DESC LIMIT 1")
+            session = latest.fetchone()[0]
+        session_runs = db.execute(
+            "SELECT id, git_commit FROM runs WHERE session = ?"
+            " ORDER BY id DESC LIMIT ?",
+            (session, runs),
+        ).fetchall()[::-1]
+        positions = {run_id: index for index, (run_id, _) in enumerate(session_runs)}
+        history: Dict[str, List] = {}
+        rows = db.execute(
+            "SELECT run_id, test_id, duration FROM durations WHERE run_id IN"
+            f" ({', '.join('?' * len(positions))})",
+            list(positions),
+        )
+        for run_id, test_id, duration in rows:
+            durations = history.setdefault(test_id, [None] * len(session_runs))
+            durations[positions[run_id]] = duration
+    db.close()
+    if not session_runs:
+        raise Exit(f"No test runs recorded for session {session}.")
+    return session, session_runs, history
+
+
+@task(name="slow-tests")
+def report_slow_tests(
+    ctx, top=20, runs=10, session=None, slower_by=0.25, min_seconds=0.01
+):  # pylint:disable=W0613,R0913,R0914
+    """
+    Report the slowest tests, and the tests that got slower, from the history.
+
+    Every test session records each test's duration into .test-history.sqlite.
+    This lists the `--top` slowest tests in the latest of the last `--runs` runs
+    of `--session` (default: the most recently run session), with the trend of
+    their durations across those runs. Tests whose latest duration is over
+    `--slower-by` (a fraction) above their median in the earlier runs, and at
+    least `--min-seconds` slower, are flagged.
+    """
+    slower_by, min_seconds = float(slower_by), float(min_seconds)
+    session, session_runs, history = load_test_history(session, runs)
+    commit = session_runs[-1][1]
+    commit = commit[:10] if commit else "an unknown commit"
+    latest = {
+        test_id: durations[-1]
+        for test_id, durations in history.items()
+        if durations[-1] is not None
+    }
+    echo(
+        f"Slowest tests in {session} ({len(session_runs)} runs, latest at {commit}),"
+        " durations oldest to newest:"
+    )
+    for test_id in sorted(latest, key=latest.__getitem__, reverse=True)[:top]:
+        print(f"  {latest[test_id]:8.3f}s  {sparkline(history[test_id])}  {test_id}")
+
+    slower = []
+    for test_id, duration in latest.items():
+        earlier = [value for value in history[test_id][:-1] if value is not None]
+        if not earlier:
+            continue
+        median = statistics.median(earlier)
+        if duration > median * (1 + slower_by) and duration - median >= min_seconds:
+            ratio = duration / median if median else float("inf")
+            slower.append((ratio, test_id, median))
+    if not slower:
+        echo("No tests got significantly slower.")
+        return
+    echo(f"{len(slower)} tests got over {slower_by:.0%} slower than their median:")
+    for ratio, test_id, median in sorted(slower, reverse=True):
+        print(
+            f"  {median:8.3f}s -> {latest[test_id]:.3f}s ({ratio - 1:+.0%})  {test_id}"
+        )
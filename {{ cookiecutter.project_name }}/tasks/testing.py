@@ -0,0 +1,352 @@
+"""Test and benchmark tasks, including affected test selection."""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Set
+
+from invoke import Exit, task
+
+from .clean import clean_coverage
+from .common import (
+    capture_argv,
+    echo,
+    get_posargs,
+    git_blob_ids,
+    list_nox_sessions,
+    run_argv,
+    run_argvs_parallel,
+)
+from .lint import format_
+
+
+def run_test_sessions_parallel(ctx, jobs, others=True):
+    """
+    Run the per-interpreter `test` sessions concurrently.
+
+    Virtualenvs are prepared serially first (nox-poetry builds the package
+    wheel into ./dist, which can't safely be done concurrently), then the
+    sessions are re-run concurrently without installing. Coverage data from
+    all of them is combined and reported exactly once at the end, even if some
+    failed. Then, if `others` is set, the rest of the default nox sessions are
+    run as usual.
+    """
+    sessions = list_nox_sessions(ctx, "--sessions", "test")
+    # Keep the test sessions from each notifying their own coverage session.
+    env = {"DEFER_COVERAGE": "1"}
+    run_argv(
+        ctx,
+        ["poetry", "run", "nox", "--install-only", "--sessions", *sessions],
+        env=env,
+    )
+    results = run_argvs_parallel(
+        ctx,
+        {
+            session: [
+                "poetry",
+                "run",
+                "nox",
+                "--reuse-existing-virtualenvs",
+                "--no-install",
+                "--sessions",
+                session,
+                *get_posargs(),
+            ]
+            for session in sessions
+        },
+        jobs,
+        env=env,
+    )
+    failed = [name for name, result in results.items() if result.failed]
+    # Report the coverage of whatever ran, even if some sessions failed (the
+    # coverage session skips itself when there's no data)
+    argv = ["poetry", "run", "nox", "--sessions", "coverage"]
+    if run_argv(ctx, argv, warn=True).failed:
+        failed.append("coverage")
+    if others:
+        rest = [
+            session
+            for session in list_nox_sessions(ctx)
+            if session not in sessions and session != "coverage"
+        ]
+        if rest:
+            argv = ["poetry", "run", "nox", "--sessions", *rest, *get_posargs()]
+            if run_argv(ctx, argv, warn=True).failed:
+                failed.append("the other default sessions")
+    if failed:
+        raise Exit(f"Failed: {', '.join(failed)}", code=1)
+
+
+# Values of `inv test --coverage`, see noxfile.py's _test_argv()
+COVERAGE_MODES = ("branch", "sysmon")
+
+# Maps source lines to the tests that execute them, see build_test_index()
+TEST_INDEX_FILE = Path(".pytest_cache") / "test-index.json"
+
+# Changes to any of these make the whole test suite "affected"
+FULL_SUITE_TRIGGERS = {
+    "pyproject.toml",
+    "poetry.lock",
+    "noxfile.py",
+    "tests/conftest.py",
+}
+
+DIFF_HUNK_REGEX = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+
+
+def build_test_index(ctx):
+    """
+    Build an index of which tests execute each source line.
+
+    The index is built from the per-test coverage contexts recorded by
+    tests/conftest.py into the combined .coverage data file. Only branch mode
+    coverage records every line each test runs, see noxfile.py's _test_argv().
+    """
+    if os.environ.get("TEST_COVERAGE", "branch") != "branch":
+        echo("Coverage wasn't measured in branch mode, not building the test index.")
+        return
+    try:
+        from coverage import CoverageData  # pylint:disable=C0415
+    except ImportError:
+        echo("coverage is not installed, not building the test index.")
+        return
+    if not Path(".coverage").exists():
+        echo("No combined coverage data found, not building the test index.")
+        return
+
+    data = CoverageData()
+    data.read()
+    tests: Set[str] = set()
+    files: Dict[str, Dict[int, List[str]]] = {}
+    for filename in data.measured_files():
+        contexts_by_lineno = data.contexts_by_lineno(filename)
+        file_tests = {ctx_ for ctxs in contexts_by_lineno.values() for ctx_ in ctxs}
+        file_tests.discard("")
+        tests.update(file_tests)
+        lines: Dict[int, List[str]] = {}
+        for lineno, contexts in contexts_by_lineno.items():
+            if "" in contexts:
+                # Executed outside of any test (eg: at import time during
+                # collection), so assume it affects every test using the file.
+                contexts = file_tests
+            if contexts:
+                lines[lineno] = sorted(contexts)
+        path = Path(filename)
+        if path.is_absolute():
+            try:
+                path = path.relative_to(Path().resolve())
+            except ValueError:
+                continue  # Not in the project, see [tool.coverage.paths]
+        files[path.as_posix()] = lines
+
+    blobs = git_blob_ids(ctx, None, sorted(files))
+    index = {
+        "commit": capture_argv(ctx, ["git", "rev-parse", "HEAD"], warn=True).strip(),
+        "tests": sorted(tests),
+        "files": {
+            path: {"blob": blobs.get(path), "lines": lines}
+            for path, lines in files.items()
+        },
+    }
+    TEST_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    TEST_INDEX_FILE.write_text(json.dumps(index))
+    echo(f"Test index for {len(tests)} tests written to {TEST_INDEX_FILE}")
+
+
+def changed_lines(ctx, since):
+    """
+    Map each path changed since the ref `since` to its changed lines.
+
+    Line numbers refer to the file as it was at `since`. Untracked files and
+    newly added files map to an empty set.
+    """
+    diff = capture_argv(
+        ctx, ["git", "diff", "-U0", "--no-color", "--no-ext-diff", since, "--"]
+    )
+    changes: Dict[str, Set[int]] = {}
+    path = None
+    in_header = False
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            path, in_header = None, True
+        elif in_header and line.startswith("--- "):
+            path = line[len("--- a/") :] if line != "--- /dev/null" else None
+        elif in_header and line.startswith("+++ ") and path is None:
+            path = line[len("+++ b/") :]
+            changes.setdefault(path, set())
+        elif path is not None:
+            in_header = False
+            match = DIFF_HUNK_REGEX.match(line)
+            if match:
+                start, count = int(match.group(1)), int(match.group(2) or 1)
+                # A pure insertion (count == 0) lands between start and start + 1
+                lines = range(start, start + max(count, 2))
+                changes.setdefault(path, set()).update(lines)
+    untracked = capture_argv(ctx, ["git", "ls-files", "--others", "--exclude-standard"])
+    for untracked_path in untracked.splitlines():
+        changes.setdefault(untracked_path, set())
+    return changes
+
+
+def select_affected_tests(ctx, since):  # pylint:disable=R0911,R0912
+    """
+    Select the tests affected by changes since the ref `since`.
+
+    Returns a list of pytest node ids/paths, or None if the whole suite should
+    be run because the test index is missing or stale, or a changed Python
+    file outside tests/ isn't in it.
+    """
+    try:
+        index = json.loads(TEST_INDEX_FILE.read_text())
+    except (OSError, ValueError):
+        echo(f"No test index found at {TEST_INDEX_FILE}.")
+        return None
+    if since is None:
+        since = index["commit"]
+    is_ancestor = run_argv(
+        ctx,
+        ["git", "merge-base", "--is-ancestor", index["commit"], "HEAD"],
+        warn=True,
+        hide=True,
+        pty=False,
+        echo=False,
+    )
+    if not is_ancestor.ok:
+        echo(f"The test index was built at {index['commit']}, not in HEAD's history.")
+        return None
+
+    changes = changed_lines(ctx, since)
+    indexed_files = index["files"]
+    blobs_at_since = git_blob_ids(ctx, since, sorted(set(changes) & set(indexed_files)))
+    selected: Set[str] = set()
+    for path, lines in changes.items():
+        if path in FULL_SUITE_TRIGGERS:
+            echo(f"{path} changed.")
+            return None
+        if path in indexed_files:
+            indexed = indexed_files[path]
+            if indexed["blob"] != blobs_at_since.get(path):
+                # The index's line numbers don't line up with the diff's
+                lines = {int(lineno) for lineno in indexed["lines"]}
+            for lineno in lines:
+                selected.update(indexed["lines"].get(str(lineno), []))
+        elif path.startswith("tests/") and path.endswith(".py"):
+            selected.add(path)
+        elif path.endswith(".py"):
+            # eg: tasks/ and benchmarks/, which tests may import
+            echo(f"{path} is not in the test index.")
+            return None
+
+    # Node ids from changed test files may be stale, so run those files whole
+    affected = set()
+    for test_id in selected:
+        test_file = test_id.split("::")[0]
+        if Path(test_file).exists():
+            affected.add(test_file if test_file in changes else test_id)
+    return sorted(affected)
+
+
+def run_changed_tests(ctx, since):
+    """Run only the tests affected by changes since the ref `since`."""
+    selected = select_affected_tests(ctx, since)
+    if selected is None:
+        echo("Running the full test suite.")
+        run_argv(ctx, ["poetry", "run", "nox", *get_posargs()])
+        build_test_index(ctx)
+        return
+    if not selected:
+        echo("No tests are affected by the changes.")
+        return
+    echo(f"Running {len(selected)} affected tests.")
+    # A partial run can't meet the coverage threshold, skip the report.
+    run_argv(
+        ctx,
+        ["poetry", "run", "nox", "--sessions", "test", *get_posargs(), "--", *selected],
+        env={"DEFER_COVERAGE": "1"},
+    )
+
+
+@task
+def test(
+    ctx,
+    autoformat=True,
+    parallel=0,
+    workers=None,
+    changed=False,
+    since=None,
+    memory=False,
+    coverage="branch",
+    fast=False,
+):  # pylint:disable=R0913
+    """
+    Run the tests.
+
+    Pass `--parallel N` to run the per-interpreter test sessions N at a time,
+    before running the rest of the nox sessions serially (or none of them,
+    with `--fast`).
+
+    Pass `--workers N` (or `--workers auto` for one per CPU) to spread the
+    tests within each test session across N processes, balanced using the
+    test durations recorded by previous runs.
+
+    Pass `--changed` to run only the tests that execute code changed since the
+    last full run (or since `--since REF`), according to the test index built
+    from the coverage data of the last full run.
+
+    Pass `--memory` to trace every test's allocations with tracemalloc and
+    write reports of their top allocation sites to .pytest_cache/memory.
+    Tests marked with `@pytest.mark.memory_budget(peak=..., net=...)` are
+    always traced, and fail when they allocate more than their budget.
+
+    Pass `--coverage sysmon` to measure line coverage with coverage's
+    sys.monitoring based core (on python 3.12+), which is much cheaper than
+    the default branch coverage but doesn't update the test index. Pass
+    `--fast` to only run the test sessions, without any coverage.
+    """
+    if coverage not in COVERAGE_MODES:
+        raise Exit(f"--coverage must be one of {', '.join(COVERAGE_MODES)}", code=1)
+    if autoformat:
+        format_(ctx)
+    clean_coverage()
+    os.environ["TEST_COVERAGE"] = "off" if fast else coverage
+    if workers is not None:
+        os.environ["TEST_WORKERS"] = str(workers)
+    if memory:
+        os.environ["TEST_MEMORY"] = "1"
+    if changed:
+        run_changed_tests(ctx, since)
+        return
+    if parallel > 0:
+        run_test_sessions_parallel(ctx, parallel, others=not fast)
+    else:
+        argv = ["poetry", "run", "nox"]
+        if fast:
+            argv.extend(["--sessions", "test"])
+        argv.extend(get_posargs())
+        run_argv(ctx, argv)
+    build_test_index(ctx)
+
+
+@task
+def bench(
+    ctx,
+    save_baseline=False,
+    threshold=None,
+    warmup=None,
+    repeat=None,
+    keyword=None,
+):  # pylint:disable=R0913
+    """Run the benchmarks and compare them against the saved baseline."""
+    argv = ["poetry", "run", "nox", "-s", "bench", "--"]
+    if save_baseline:
+        argv.append("--save-baseline")
+    for flag, value in (
+        ("--threshold", threshold),
+        ("--warmup", warmup),
+        ("--repeat", repeat),
+        ("--keyword", keyword),
+    ):
+        if value is not None:
+            argv.extend([flag, str(value)])
+    argv.extend(get_posargs())
+    run_argv(ctx, argv)
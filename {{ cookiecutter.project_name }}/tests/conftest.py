@@ -0,0 +1,374 @@
+"""Pytest configuration and plugins for the {{ cookiecutter.project_name }} tests."""
+import json
+import math
+import os
+import statistics
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Generator,
+    List,
+    Sequence,
+    Tuple,
+)
+
+import pytest
+
+try:
+    from coverage import Coverage
+except ImportError:  # pragma: no cover
+    Coverage = None  # type: ignore
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Register the command line options used by the nox `test` session."""
+    group = parser.getgroup("{{ cookiecutter.module_name }}")
+    group.addoption(
+        "--select-from",
+        metavar="FILE",
+        default=None,
+        help="Only run the tests whose node ids are listed (one per line) in FILE.",
+    )
+    group.addoption(
+        "--store-durations",
+        metavar="FILE",
+        default=None,
+        help="Write the duration of every test run to FILE as JSON.",
+    )
+    group.addoption(
+        "--memory-report",
+        metavar="FILE",
+        default=None,
+        help="Trace the memory allocated by every test, writing a report to FILE.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Register markers and optional plugins."""
+    config.addinivalue_line(
+        "markers",
+        "memory_budget(peak=None, net=None): fail the test if it allocates more"
+        " than peak bytes at once, or leaves more than net bytes allocated.",
+    )
+    config.addinivalue_line(
+        "markers",
+        "scaling(bound, sizes=..., repeat=3, tolerance=0.5): fail the test if the"
+        " runtime measured by the scaling fixture grows faster than O(bound).",
+    )
+    durations_path = config.getoption("store_durations")
+    if durations_path:
+        config.pluginmanager.register(DurationRecorder(Path(durations_path)))
+    memory_report_path = config.getoption("memory_report")
+    if memory_report_path:
+        config.pluginmanager.register(
+            MemoryRecorder(Path(memory_report_path)), MemoryRecorder.name
+        )
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: List[pytest.Item]
+) -> None:
+    """Deselect tests not listed in the --select-from file, if one was given."""
+    select_from = config.getoption("select_from")
+    if not select_from:
+        return
+    wanted = set(Path(select_from).read_text().splitlines())
+    selected = [item for item in items if item.nodeid in wanted]
+    deselected = [item for item in items if item.nodeid not in wanted]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item: pytest.Item) -> Generator[None, None, None]:
+    """
+    Record coverage for each test under a context named after its node id.
+
+    `inv test` uses these contexts to build an index of which tests execute
+    each source line, which `inv test --changed` uses to select tests. The
+    sys.monitoring core can't record contexts, so they're skipped under it.
+    """
+    coverage = Coverage.current() if Coverage is not None else None
+    if coverage is None or os.environ.get("COVERAGE_CORE") == "sysmon":
+        yield
+        return
+    coverage.switch_context(item.nodeid)
+    yield
+    coverage.switch_context("")
+
+
+def _empty_call(*_args: Any, **_kwargs: Any) -> None:
+    """Do nothing, to measure what calling a test allocates by itself."""
+
+
+def _own_allocations(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    """Filter out the allocations made by pytest and this plugin."""
+    return snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "*/pluggy/*"),
+            tracemalloc.Filter(False, "*/_pytest/*"),
+        ]
+    )
+
+
+def _traced(
+    func: Callable[..., Any], measurements: List[Tuple[int, int, tracemalloc.Snapshot]]
+) -> Callable[..., Any]:
+    """
+    Wrap func to measure the memory it allocates.
+
+    Each call appends its peak and net allocation, excluding the allocations
+    made by pytest and this plugin that are still held afterwards, and a
+    snapshot of its own allocations to measurements.
+    """
+
+    def traced(*args: Any, **kwargs: Any) -> Any:
+        # Also resets the peak
+        tracemalloc.clear_traces()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            own = _own_allocations(snapshot)
+            net = sum(stat.size for stat in own.statistics("filename"))
+            total = sum(stat.size for stat in snapshot.statistics("filename"))
+            measurements.append((peak - (total - net), net, own))
+
+    return traced
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_pyfunc_call(pyfuncitem: pytest.Function) -> Generator[None, Any, None]:
+    """
+    Trace the memory allocated by a test function under tracemalloc.
+
+    Tests with a memory_budget marker are always traced, and fail if their
+    peak or net allocation exceeds the budget. Every test is traced when a
+    --memory-report is requested.
+
+    Only the test function's own allocations count: the call itself is
+    measured by first calling an empty function with the same arguments,
+    which is subtracted from the peak, and whatever pytest and this plugin
+    still hold afterwards is left out.
+    """
+    marker = pyfuncitem.get_closest_marker("memory_budget")
+    recorder = pyfuncitem.config.pluginmanager.get_plugin(MemoryRecorder.name)
+    if marker is None and recorder is None:
+        yield
+        return
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    measurements: List[Tuple[int, int, tracemalloc.Snapshot]] = []
+    test_function = pyfuncitem.obj
+
+    def call_test(*args: Any, **kwargs: Any) -> Any:
+        _traced(_empty_call, measurements)(*args, **kwargs)
+        return _traced(test_function, measurements)(*args, **kwargs)
+
+    pyfuncitem.obj = call_test
+    try:
+        outcome = yield
+    finally:
+        pyfuncitem.obj = test_function
+        if started:
+            tracemalloc.stop()
+    if len(measurements) < 2:  # The test function wasn't called
+        return
+    empty_peak, empty_net, _ = measurements[0]
+    peak, net, snapshot = measurements[1]
+    peak, net = max(peak - empty_peak, 0), max(net - empty_net, 0)
+    if recorder is not None:
+        recorder.record(pyfuncitem.nodeid, peak, net, snapshot)
+    if marker is None or outcome.excinfo is not None:
+        return
+    exceeded = [
+        f"{kind} allocation of {format_bytes(used)} exceeds its budget of"
+        f" {format_bytes(marker.kwargs[kind])}"
+        for kind, used in (("peak", peak), ("net", net))
+        if marker.kwargs.get(kind) is not None and used > marker.kwargs[kind]
+    ]
+    if exceeded:
+        outcome.force_exception(pytest.fail.Exception("; ".join(exceeded)))
+
+
+# The bounds the scaling marker accepts, as functions of the input size
+COMPLEXITY_CLASSES: Dict[str, Callable[[float], float]] = {
+    "1": lambda n: 1.0,
+    "log n": math.log,
+    "n": lambda n: n,
+    "n log n": lambda n: n * math.log(n),
+    "n^2": lambda n: n**2,
+    "n^3": lambda n: n**3,
+}
+
+DEFAULT_SCALING_SIZES = (1000, 2000, 4000, 8000, 16000)
+
+
+class Scaling:
+    """
+    Time a function at several input sizes, and check how its runtime grows.
+
+    The growth is the slope of a least squares fit of log(runtime / bound(n))
+    against log(n): 0 when the runtime grows exactly as the bound, 1 when it
+    grows by another factor of n (eg: a quadratic loop where O(n) was
+    declared). Runtimes above the bound by more than `tolerance` fail.
+    """
+
+    def __init__(
+        self,
+        bound: str,
+        sizes: Sequence[int] = DEFAULT_SCALING_SIZES,
+        repeat: int = 3,
+        tolerance: float = 0.5,
+    ) -> None:
+        """Check runtimes grow no faster than bound, the best of repeat runs."""
+        if bound not in COMPLEXITY_CLASSES:
+            raise ValueError(
+                f"Unknown scaling bound {bound!r}, expected one of"
+                f" {', '.join(COMPLEXITY_CLASSES)}"
+            )
+        if len(sizes) < 3 or min(sizes) < 2:
+            raise ValueError("At least 3 input sizes of 2 or more are required")
+        self.bound = bound
+        self.sizes = sorted(sizes)
+        self.repeat = repeat
+        self.tolerance = tolerance
+        self.timings: Dict[int, float] = {}
+
+    def run(
+        self, func: Callable[[Any], Any], make_input: Callable[[int], Any] = int
+    ) -> None:
+        """
+        Time func(make_input(n)) at each size, failing if it grows too fast.
+
+        Inputs are made outside of the timed call. Sizes are interleaved across
+        repeats so that drifting machine load affects them all alike.
+        """
+        self.timings = {}
+        for _ in range(self.repeat):
+            for size in self.sizes:
+                arg = make_input(size)
+                start = perf_counter()
+                func(arg)
+                elapsed = perf_counter() - start
+                self.timings[size] = min(elapsed, self.timings.get(size, elapsed))
+        growth = self.growth()
+        if growth > self.tolerance:
+            timings = ", ".join(
+                f"n={size}: {seconds * 1000:.3f}ms"
+                for size, seconds in self.timings.items()
+            )
+            pytest.fail(
+                f"Runtime grows faster than O({self.bound}): its growth above the"
+                f" bound is n^{growth:.2f}, over the tolerance of"
+                f" n^{self.tolerance} ({timings})"
+            )
+
+    def growth(self) -> float:
+        """Fit the exponent by which the runtimes outgrow the bound."""
+        bound = COMPLEXITY_CLASSES[self.bound]
+        xs = [math.log(size) for size in self.timings]
+        ys = [
+            # Clamp to the clock's resolution, so instant runs don't break log()
+            math.log(max(seconds, 1e-9) / bound(size))
+            for size, seconds in self.timings.items()
+        ]
+        mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+        return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum(
+            (x - mean_x) ** 2 for x in xs
+        )
+
+
+@pytest.fixture
+def scaling(request: pytest.FixtureRequest) -> Scaling:
+    """Get a Scaling configured by the test's scaling marker."""
+    marker = request.node.get_closest_marker("scaling")
+    if marker is None:
+        raise pytest.UsageError(
+            f"{request.node.nodeid} uses the scaling fixture without a"
+            " @pytest.mark.scaling(bound) marker"
+        )
+    return Scaling(*marker.args, **marker.kwargs)
+
+
+def format_bytes(size: float) -> str:
+    """Render a number of bytes with a human friendly unit."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class DurationRecorder:
+    """Record the total (setup + call + teardown) duration of each test."""
+
+    def __init__(self, path: Path) -> None:
+        """Record durations to be written to path."""
+        self.path = path
+        self.durations: DefaultDict[str, float] = defaultdict(float)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """Accumulate the duration of each test phase."""
+        self.durations[report.nodeid] += report.duration
+
+    def pytest_sessionfinish(self) -> None:
+        """Write the recorded durations."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.durations, indent=2, sort_keys=True))
+
+
+class MemoryRecorder:
+    """Record each test's peak and net allocations, and top allocation sites."""
+
+    name = "memory_recorder"
+    # The number of allocation sites to report per test
+    top_sites = 5
+
+    def __init__(self, path: Path) -> None:
+        """Record allocations to be reported to path."""
+        self.path = path
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def record(
+        self, nodeid: str, peak: int, net: int, snapshot: tracemalloc.Snapshot
+    ) -> None:
+        """Record a test's allocations, and the sites still holding memory."""
+        self.results[nodeid] = {
+            "peak": peak,
+            "net": net,
+            "sites": snapshot.statistics("lineno")[: self.top_sites],
+        }
+
+    def pytest_sessionfinish(self) -> None:
+        """Write the report, the tests with the highest peak allocation first."""
+        lines: List[str] = []
+        ranked = sorted(self.results.items(), key=lambda kv: -int(kv[1]["peak"]))
+        for nodeid, result in ranked:
+            lines.append(
+                f"{nodeid}: peak {format_bytes(result['peak'])},"
+                f" net {format_bytes(result['net'])}"
+            )
+            for stat in result["sites"]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"    {frame.filename}:{frame.lineno}:"
+                    f" {format_bytes(stat.size)} in {stat.count} blocks"
+                )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("\n".join(lines) + "\n")
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        """Point at the report."""
+        terminalreporter.write_line(f"Memory report written to {self.path}")
@@ -0,0 +1,131 @@
+"""Tests for the memory_budget and scaling markers in tests/conftest.py."""
+from pathlib import Path
+
+import pytest
+
+pytest_plugins = ["pytester"]
+
+
+@pytest.fixture(name="conftest_pytester")
+def fixture_conftest_pytester(pytester: pytest.Pytester) -> pytest.Pytester:
+    """Get a pytester whose test runs use this project's conftest.py."""
+    pytester.makeconftest(Path(__file__).with_name("conftest.py").read_text())
+    return pytester
+
+
+def test_memory_budget_passes(conftest_pytester: pytest.Pytester) -> None:
+    """Test that tests allocating nothing, or within budget, pass."""
+    conftest_pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.memory_budget(peak=0, net=0)
+        def test_empty():
+            pass
+
+        @pytest.mark.memory_budget(peak=0, net=0)
+        def test_empty_with_fixture(tmp_path):
+            pass
+
+        @pytest.mark.memory_budget(peak=1024 * 1024, net=1024)
+        def test_within_budget():
+            assert len(bytearray(100 * 1024)) == 100 * 1024
+        """
+    )
+    result = conftest_pytester.runpytest_subprocess()
+    result.assert_outcomes(passed=3)
+
+
+def test_memory_budget_fails(conftest_pytester: pytest.Pytester) -> None:
+    """Test that tests allocating more than their budget fail."""
+    conftest_pytester.makepyfile(
+        """
+        import pytest
+
+        KEPT = []
+
+        @pytest.mark.memory_budget(peak=1024)
+        def test_peak():
+            assert len(bytearray(100 * 1024)) == 100 * 1024
+
+        @pytest.mark.memory_budget(net=1024)
+        def test_net():
+            KEPT.append(bytearray(100 * 1024))
+        """
+    )
+    result = conftest_pytester.runpytest_subprocess()
+    result.assert_outcomes(failed=2)
+    result.stdout.fnmatch_lines(
+        [
+            "E*Failed: peak allocation of 10?.? KiB exceeds its budget of 1.0 KiB",
+            "E*Failed: net allocation of 10?.? KiB exceeds its budget of 1.0 KiB",
+        ]
+    )
+
+
+def test_memory_report(conftest_pytester: pytest.Pytester) -> None:
+    """Test that --memory-report reports every test's allocations."""
+    conftest_pytester.makepyfile(
+        """
+        KEPT = []
+
+        def test_small():
+            KEPT.append(bytearray(1024))
+
+        def test_large():
+            KEPT.append(bytearray(100 * 1024))
+        """
+    )
+    result = conftest_pytester.runpytest_subprocess("--memory-report=memory.txt")
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["Memory report written to memory.txt"])
+    report = (conftest_pytester.path / "memory.txt").read_text().splitlines()
+    # The tests with the highest peak allocation come first
+    assert report[0].startswith("test_memory_report.py::test_large: peak 10")
+    assert "test_memory_report.py:7: 100." in report[1]
+    assert any(line.startswith("test_memory_report.py::test_small:") for line in report)
+
+
+def test_scaling_fails(conftest_pytester: pytest.Pytester) -> None:
+    """Test that a runtime growing faster than its declared bound fails."""
+    conftest_pytester.makepyfile(
+        """
+        import pytest
+
+        def quadratic(n):
+            for i in range(n):
+                for j in range(n):
+                    pass
+
+        @pytest.mark.scaling("n", sizes=(100, 200, 400, 800))
+        def test_quadratic(scaling):
+            scaling.run(quadratic)
+        """
+    )
+    result = conftest_pytester.runpytest_subprocess()
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["E*Failed: Runtime grows faster than O(n):*"])
+
+
+def test_scaling_usage_errors(conftest_pytester: pytest.Pytester) -> None:
+    """Test that unknown bounds, or a missing marker, are reported as errors."""
+    conftest_pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.scaling("n!")
+        def test_unknown_bound(scaling):
+            pass
+
+        def test_missing_marker(scaling):
+            pass
+        """
+    )
+    result = conftest_pytester.runpytest_subprocess()
+    result.assert_outcomes(errors=2)
+    result.stdout.fnmatch_lines(
+        [
+            "E*ValueError: Unknown scaling bound 'n!', expected one of 1, log n, n,*",
+            "E*UsageError: *::test_missing_marker uses the scaling fixture without*",
+        ]
+    )
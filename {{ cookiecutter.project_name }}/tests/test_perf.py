@@ -0,0 +1,144 @@
+"""Tests for the {{ cookiecutter.module_name }}._perf instrumentation."""
+import json
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from {{ cookiecutter.module_name }} import _perf
+
+from .conftest import Scaling
+
+
+@pytest.fixture(name="perf")
+def fixture_perf() -> Iterator[None]:
+    """Enable instrumentation, with no metrics recorded, for a test."""
+    enabled = _perf.is_enabled()
+    _perf.enable()
+    _perf.reset()
+    yield
+    _perf.reset()
+    if not enabled:
+        _perf.disable()
+
+
+def test_disabled_is_a_noop() -> None:
+    """Test that nothing is recorded, or wrapped, while disabled."""
+    _perf.disable()
+
+    def func() -> None:
+        """Do nothing."""
+
+    assert _perf.timed("timed")(func) is func
+    assert _perf.counted("counted")(func) is func
+    with _perf.timer("timer"):
+        _perf.increment("counter")
+        _perf.observe("histogram", 1.0)
+    assert _perf.snapshot() == {"counters": {}, "histograms": {}}
+
+
+@pytest.mark.usefixtures("perf")
+def test_timers() -> None:
+    """Test that timers record into histograms."""
+
+    @_perf.timed("timed")
+    def func() -> int:
+        """Return a value."""
+        return 1
+
+    assert func() == 1
+    assert func.__name__ == "func"
+    with _perf.timer("timer"):
+        pass
+    histograms = _perf.snapshot()["histograms"]
+    assert histograms["timed"]["count"] == 1
+    assert histograms["timer"]["count"] == 1
+    assert histograms["timer"]["buckets"]["+Inf"] == 1
+
+
+@pytest.mark.usefixtures("perf")
+def test_histogram_buckets() -> None:
+    """Test that bucket counts are cumulative and bounds are inclusive."""
+    for value in (0.5, 1.0, 1.5, 3.0):
+        _perf.observe("histogram", value, buckets=(2.0, 1.0))
+    histogram = _perf.snapshot()["histograms"]["histogram"]
+    assert histogram == {
+        "count": 4,
+        "sum": 6.0,
+        "buckets": {"1.0": 2, "2.0": 3, "+Inf": 4},
+    }
+
+
+@pytest.mark.usefixtures("perf")
+def test_counters() -> None:
+    """Test counting calls and increments."""
+
+    @_perf.counted("calls")
+    def func() -> None:
+        """Do nothing."""
+
+    func()
+    func()
+    _perf.increment("items", 3)
+    assert _perf.snapshot()["counters"] == {"calls": 2.0, "items": 3.0}
+
+
+@pytest.mark.usefixtures("perf")
+def test_thread_safety() -> None:
+    """Test that concurrent updates aren't lost."""
+
+    def work() -> None:
+        """Update some metrics."""
+        for _ in range(1000):
+            _perf.increment("counter")
+            _perf.observe("histogram", 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    current = _perf.snapshot()
+    assert current["counters"]["counter"] == 8000
+    assert current["histograms"]["histogram"]["count"] == 8000
+
+
+@pytest.mark.usefixtures("perf")
+def test_to_prometheus() -> None:
+    """Test rendering the Prometheus text format."""
+    _perf.increment("requests.served")
+    _perf.observe("latency", 0.5, buckets=(1.0,))
+    assert _perf.to_prometheus(namespace="app").splitlines() == [
+        "# TYPE app_requests_served_total counter",
+        "app_requests_served_total 1.0",
+        "# TYPE app_latency histogram",
+        'app_latency_bucket{le="1.0"} 1',
+        'app_latency_bucket{le="+Inf"} 1',
+        "app_latency_sum 0.5",
+        "app_latency_count 1",
+    ]
+
+
+@pytest.mark.usefixtures("perf")
+def test_dump(tmp_path: Path) -> None:
+    """Test dumping snapshots as JSON and in the Prometheus format."""
+    _perf.increment("counter")
+    _perf.dump(tmp_path / "metrics.json")
+    _perf.dump(tmp_path / "metrics.prom")
+    assert json.loads((tmp_path / "metrics.json").read_text()) == _perf.snapshot()
+    assert (tmp_path / "metrics.prom").read_text() == _perf.to_prometheus()
+
+
+@pytest.mark.scaling("n log n", sizes=(500, 1000, 2000, 4000, 8000))
+def test_snapshot_scaling(scaling: Scaling) -> None:
+    """Test that snapshots scale with the number of metrics (which are sorted)."""
+
+    def make_registry(size: int) -> _perf.Registry:
+        """Make a registry holding size counters."""
+        registry = _perf.Registry()
+        for index in range(size):
+            registry.counter(f"counter{index}").inc()
+        return registry
+
+    scaling.run(_perf.Registry.snapshot, make_registry)
@@ -0,0 +1,101 @@
+"""Tests for collapsing profiles into stacks in tasks/profiling.py."""
+import pstats
+from typing import Any, Dict, Tuple
+
+import pytest
+
+pytest.importorskip("invoke")
+profiling = pytest.importorskip("tasks.profiling")
+
+Func = Tuple[str, int, str]
+
+MAIN: Func = ("app.py", 1, "main")
+PARSE: Func = ("app.py", 10, "parse")
+RENDER: Func = ("app.py", 20, "render")
+WRITE: Func = ("app.py", 30, "write")
+EXEC: Func = ("~", 0, "<built-in method builtins.exec>")
+IMPORT: Func = ("<frozen importlib._bootstrap>", 1, "_find_and_load")
+
+
+def make_stats(entries: Dict[Func, Tuple[float, float, Dict[Func, float]]]) -> Any:
+    """
+    Make a pstats.Stats from (own time, cumulative time, callers) entries.
+
+    Each caller maps to the cumulative time spent in the function via it.
+    """
+    stats: Any = pstats.Stats()
+    stats.stats = {
+        func: (
+            1,
+            1,
+            own_time,
+            cumulative_time,
+            {
+                caller: (1, 1, own_time * edge_time / cumulative_time, edge_time)
+                for caller, edge_time in callers.items()
+            },
+        )
+        for func, (own_time, cumulative_time, callers) in entries.items()
+    }
+    return stats
+
+
+def own_times(collapsed: Dict[str, int]) -> Dict[str, int]:
+    """Sum collapsed stacks' microseconds by their innermost frame."""
+    totals: Dict[str, int] = {}
+    for stack, microseconds in collapsed.items():
+        frame = stack.split(";")[-1]
+        totals[frame] = totals.get(frame, 0) + microseconds
+    return totals
+
+
+def test_collapse_stacks() -> None:
+    """Test that a shared callee's time is split between its callers."""
+    stats = make_stats(
+        {
+            MAIN: (1.0, 10.0, {}),
+            PARSE: (2.0, 3.0, {MAIN: 3.0}),
+            RENDER: (2.0, 6.0, {MAIN: 6.0}),
+            WRITE: (5.0, 5.0, {PARSE: 1.0, RENDER: 4.0}),
+        }
+    )
+    assert profiling.collapse_stacks(stats) == {
+        "app.py:1(main)": 1_000_000,
+        "app.py:1(main);app.py:10(parse)": 2_000_000,
+        "app.py:1(main);app.py:10(parse);app.py:30(write)": 1_000_000,
+        "app.py:1(main);app.py:20(render)": 2_000_000,
+        "app.py:1(main);app.py:20(render);app.py:30(write)": 4_000_000,
+    }
+
+
+def test_collapse_stacks_recursion_cycle() -> None:
+    """Test that call graphs whose every function has a caller are collapsed."""
+    # exec runs a module, which imports another that exec runs in turn
+    stats = make_stats(
+        {
+            EXEC: (1.0, 10.0, {IMPORT: 6.0}),
+            IMPORT: (3.0, 9.0, {EXEC: 9.0}),
+            PARSE: (2.0, 2.0, {EXEC: 2.0}),
+        }
+    )
+    collapsed = profiling.collapse_stacks(stats)
+    # The function with the most cumulative time becomes the root
+    assert all(stack.startswith("<built-in method") for stack in collapsed)
+    assert own_times(collapsed) == {
+        "<built-in method builtins.exec>": 1_000_000,
+        "<frozen importlib._bootstrap>:1(_find_and_load)": 3_000_000,
+        "app.py:10(parse)": 2_000_000,
+    }
+
+
+def test_stack_roots() -> None:
+    """Test that functions unreachable from any caller-less root become roots."""
+    stats = make_stats(
+        {
+            MAIN: (1.0, 1.0, {}),
+            EXEC: (1.0, 10.0, {IMPORT: 6.0}),
+            IMPORT: (3.0, 9.0, {EXEC: 9.0}),
+        }
+    )
+    callees = profiling.call_edges(stats)
+    assert profiling.stack_roots(stats, callees) == [MAIN, EXEC]
@@ -0,0 +1,120 @@
+"""Tests for the test selection in tasks/testing.py (`inv test --changed`)."""
+import subprocess
+from pathlib import Path
+from typing import Any
+
+import pytest
+from coverage import Coverage, CoverageData
+
+invoke = pytest.importorskip("invoke")
+testing = pytest.importorskip("tasks.testing")
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+
+MODULE = """\
+def add(a, b):
+    return a + b
+
+
+def sub(a, b):
+    return a - b
+"""
+
+TESTS = """\
+from pkg.mod import add, sub
+
+
+def test_add():
+    assert add(1, 2) == 3
+
+
+def test_sub():
+    assert sub(2, 1) == 1
+"""
+
+
+def make_context() -> Any:
+    """Make an invoke context that doesn't read pytest's captured stdin."""
+    return invoke.Context(invoke.Config(overrides={"run": {"in_stream": False}}))
+
+
+def git(*args: str) -> None:
+    """Run a git command in the current directory."""
+    identity = ["-c", "user.name=test", "-c", "user.email=test@example.com"]
+    subprocess.run(["git", *identity, *args], check=True, capture_output=True)
+
+
+@pytest.fixture(name="repo")
+def fixture_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Change into a new git repo holding a module and its tests."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("TEST_COVERAGE", raising=False)
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "src" / "pkg" / "mod.py").write_text(MODULE)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_mod.py").write_text(TESTS)
+    git("init", "-q")
+    git("add", ".")
+    git("commit", "-qm", "Initial commit")
+    return tmp_path
+
+
+def write_coverage(repo: Path) -> None:
+    """
+    Write the combined coverage of a run of tests/test_mod.py in a nox session.
+
+    The data is recorded against the module installed in the session's
+    virtualenv, as it is by `nox -s test`, then combined using the project's
+    [tool.coverage.paths].
+    """
+    venv = repo / ".nox" / "test-3-12"
+    module = str(venv / "lib" / "python3.12" / "site-packages" / "pkg" / "mod.py")
+    data = CoverageData(basename=str(repo / ".coverage.test"))
+    data.set_context("")  # Imported during collection
+    data.add_lines({module: [1, 5]})
+    data.set_context("tests/test_mod.py::test_add")
+    data.add_lines({module: [2]})
+    data.set_context("tests/test_mod.py::test_sub")
+    data.add_lines({module: [6]})
+    data.write()
+    coverage = Coverage(
+        data_file=str(repo / ".coverage"),
+        config_file=str(PROJECT_DIR / "pyproject.toml"),
+    )
+    coverage.combine([str(repo / ".coverage.test")])
+    coverage.save()
+
+
+def test_select_affected_tests(repo: Path) -> None:
+    """Test that only the tests executing the changed lines are selected."""
+    write_coverage(repo)
+    ctx = make_context()
+    testing.build_test_index(ctx)
+    assert testing.select_affected_tests(ctx, None) == []
+
+    module = repo / "src" / "pkg" / "mod.py"
+    module.write_text(MODULE.replace("a - b", "-b + a"))
+    assert testing.select_affected_tests(ctx, None) == ["tests/test_mod.py::test_sub"]
+
+    module.write_text(MODULE.replace("def sub", "def subtract"))
+    assert testing.select_affected_tests(ctx, None) == [
+        "tests/test_mod.py::test_add",
+        "tests/test_mod.py::test_sub",
+    ]
+
+
+def test_select_affected_tests_full_suite(repo: Path) -> None:
+    """Test that the whole suite is run without an index, or on unindexed changes."""
+    ctx = make_context()
+    assert testing.select_affected_tests(ctx, None) is None
+
+    write_coverage(repo)
+    testing.build_test_index(ctx)
+    (repo / "pyproject.toml").write_text("")
+    assert testing.select_affected_tests(ctx, None) is None
+
+    (repo / "pyproject.toml").unlink()
+    (repo / "tasks").mkdir()
+    (repo / "tasks" / "helpers.py").write_text("")
+    assert testing.select_affected_tests(ctx, None) is None
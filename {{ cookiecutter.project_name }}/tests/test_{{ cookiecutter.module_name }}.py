@@ -1,4 +1,7 @@
 """Tests for {{ cookiecutter.project_name }}."""
+import sys
+from types import ModuleType
+
 import pytest
 
 import {{ cookiecutter.module_name }}
@@ -10,5 +13,24 @@ def test_version_available() -> None:
     assert version_attr is not None
 
 
+def test_lazy_submodule_import(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test lazy submodules are imported on first attribute access."""
+    name = "_lazy_test_submodule"
+    package = {{ cookiecutter.module_name }}
+    submodule = ModuleType(f"{package.__name__}.{name}")
+    monkeypatch.setitem(sys.modules, f"{package.__name__}.{name}", submodule)
+    monkeypatch.setattr(package, "_LAZY_SUBMODULES", frozenset([name]))
+    assert name in dir(package)
+    assert getattr(package, name) is submodule
+    # __getattr__ caches the submodule on the package
+    delattr(package, name)
+
+
+def test_missing_attribute() -> None:
+    """Test accessing a missing attribute still raises AttributeError."""
+    with pytest.raises(AttributeError):
+        getattr({{ cookiecutter.module_name }}, "does_not_exist")
+
+
 if __name__ == "__main__":
     pytest.main()